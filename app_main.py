@@ -9,6 +9,7 @@ import os
 import sys
 import threading
 import importlib.util
+import multiprocessing
 import tkinter as tk
 import ttkbootstrap as ttk
 
@@ -195,6 +196,8 @@ class MainApp:
 
     def preload_modules(self, progress_callback):
         total = len(MODULES_TO_LOAD)
+        if self.base_dir not in sys.path:
+            sys.path.insert(0, self.base_dir)
 
         for i, (module_name, class_name, display_name) in enumerate(MODULES_TO_LOAD):
             try:
@@ -484,4 +487,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
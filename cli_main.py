@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+网络工具箱 - 命令行入口
+不加载任何GUI组件，可在无桌面的Linux服务器上由cron等调度执行
+
+用法示例：
+    python cli_main.py collect -i 设备清单.xlsx -c 200 --engine asyncio
+    python cli_main.py parse
+    python cli_main.py pipeline -i 设备清单.xlsx
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+
+
+def get_base_dir():
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def log(msg):
+    print(msg, flush=True)
+
+
+def write(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def run_collect(args, stream=None):
+    from modules.ssh_collector_core import LLDPSSHCollector
+
+    collector = LLDPSSHCollector(args.base_dir, write)
+    if stream is not None:
+        collector.saved_callback = stream.submit
+    collector.collect_batch(
+        args.inventory,
+        args.concurrency,
+        engine=args.engine,
+        pipeline=args.pipeline,
+        max_age=args.max_age * 60,
+        adaptive=args.adaptive,
+        processes=args.processes,
+        preflight=args.preflight,
+        preflight_timeout=args.preflight_timeout,
+        resume=args.resume,
+        max_attempts=args.attempts,
+        retry_delay=args.retry_delay,
+        archive=not args.no_archive,
+    )
+    stats = collector.stats
+    if not any(stats.values()):
+        return 1, None
+    return (1 if stats["failed"] else 0), collector.output_dir
+
+
+def run_export(args):
+    from modules.capture_store import CaptureStore
+
+    store = CaptureStore(os.path.join(args.base_dir, "captures"))
+    if args.list:
+        for run_id in store.list_runs():
+            manifest = store.load_manifest(run_id)
+            log(
+                f"{run_id}  采集 {manifest['collected']} 台, 共 {len(manifest['devices'])} 台"
+            )
+        return 0, None
+    output = args.output or os.path.join(
+        args.output_dir, f"captures_{args.run or 'latest'}"
+    )
+    run_id, count = store.export(output, args.run)
+    log(f"已导出采集 {run_id}: {count} 台设备 -> {output}")
+    return 0, output
+
+
+def make_parser(args, input_dir):
+    from modules.lldp_parser_core import LLDPTextParser
+
+    cache_dir = None if args.no_parse_cache else os.path.join(args.base_dir, "cache")
+    return LLDPTextParser(
+        input_dir, args.output_dir, log_callback=log, cache_dir=cache_dir
+    )
+
+
+def run_parse(args, input_dir=None, parser=None):
+    input_dir = input_dir or args.input or os.path.join(args.base_dir, "lldp_data")
+    parser = parser or make_parser(args, input_dir)
+    success, info = parser.parse_all(args.parse_processes)
+    if not success:
+        log(f"解析失败: {info}")
+        return 1, None
+    log(f"布线表: {info}")
+    return 0, info
+
+
+def run_config(args, excel_path=None):
+    from modules.config_generator_core import ConfigGenerator
+
+    generator = ConfigGenerator(args.output_dir, log_callback=log)
+    count, output_file = generator.generate(excel_path or args.excel, args.templates)
+    return (0 if output_file else 1), output_file
+
+
+def run_topo_pdf(args, excel_path=None):
+    from modules.topo_pdf_core import TopoGrapher
+
+    result = TopoGrapher(excel_path or args.excel, args.output_dir).generate()
+    if result == "ENCODING_ERROR" or result.startswith("GRAPHVIZ_ERROR"):
+        log(f"PDF拓扑生成失败: {result}")
+        return 1, None
+    log(f"PDF拓扑: {result}")
+    return 0, result
+
+
+def run_topo_html(args, excel_path=None):
+    from modules.topo_html_core import InteractiveTopo
+
+    result = InteractiveTopo(excel_path or args.excel, args.output_dir).generate()
+    if not result:
+        log("HTML拓扑生成失败，请检查Excel文件格式")
+        return 1, None
+    log(f"HTML拓扑: {result}")
+    return 0, result
+
+
+def run_pipeline(args):
+    parser = stream = None
+    if not args.no_stream:
+        parser = make_parser(args, os.path.join(args.base_dir, "lldp_data"))
+        stream = parser.stream(args.parse_processes)
+    try:
+        code, data_dir = run_collect(args, stream)
+    finally:
+        if stream is not None:
+            stream.close()
+    if data_dir is None:
+        return 1, None
+    parse_code, excel_path = run_parse(args, data_dir, parser)
+    if excel_path is None:
+        return 1, None
+    code |= parse_code
+
+    stages = [
+        ("config", run_config),
+        ("topo-pdf", run_topo_pdf),
+        ("topo-html", run_topo_html),
+    ]
+    for name, stage in stages:
+        if name in args.skip:
+            continue
+        try:
+            code |= stage(args, excel_path)[0]
+        except Exception as e:
+            log(f"{name} 阶段出错: {e}")
+            code = 1
+    return code, excel_path
+
+
+def add_collect_arguments(p):
+    p.add_argument(
+        "-i", "--inventory", required=True, help="设备清单(xlsx/csv/yaml/sqlite)"
+    )
+    p.add_argument("-c", "--concurrency", type=int, default=50, help="并发上限")
+    p.add_argument("--engine", choices=["thread", "asyncio"], default="thread")
+    p.add_argument("--pipeline", action="store_true", help="流水线发送命令")
+    p.add_argument(
+        "--max-age", type=int, default=0, help="跳过该分钟数内已采集的设备(0为不跳过)"
+    )
+    p.add_argument("--adaptive", action="store_true", help="自适应并发")
+    p.add_argument(
+        "-p", "--processes", type=int, default=1, help="采集进程数(多核分片采集)"
+    )
+    p.add_argument(
+        "--preflight", action="store_true", help="采集前预检TCP/22，剔除不可达设备"
+    )
+    p.add_argument(
+        "--preflight-timeout",
+        type=float,
+        help="预检超时秒数(默认5秒，超时的设备仍照常采集)",
+    )
+    p.add_argument(
+        "--resume", action="store_true", help="断点续采，跳过上次已成功的设备"
+    )
+    p.add_argument("--attempts", type=int, default=1, help="每台设备最多尝试次数")
+    p.add_argument(
+        "--no-archive", action="store_true", help="不保存采集历史(captures目录)"
+    )
+    p.add_argument(
+        "--retry-delay", type=float, default=10, help="首次重试等待秒数(之后逐次翻倍)"
+    )
+
+
+def add_parse_arguments(p, *flags):
+    p.add_argument(
+        *flags,
+        dest="parse_processes",
+        metavar="N",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="解析进程数(默认为CPU核数)",
+    )
+    p.add_argument(
+        "--no-parse-cache",
+        action="store_true",
+        help="不使用解析缓存(cache目录)，全部文件重新解析",
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="网络工具箱 - 命令行模式")
+    parser.add_argument("--base-dir", default=get_base_dir(), help="工作目录")
+    parser.add_argument("--output-dir", help="输出目录(默认为 工作目录/output)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("collect", help="SSH批量采集")
+    add_collect_arguments(p)
+    p.set_defaults(func=run_collect)
+
+    p = sub.add_parser("export", help="从采集历史导出某次采集的文件夹")
+    p.add_argument("--run", help="运行ID(默认为最近一次)")
+    p.add_argument("-o", "--output", help="导出目录(默认为 输出目录/captures_<运行ID>)")
+    p.add_argument("--list", action="store_true", help="列出所有采集历史")
+    p.set_defaults(func=run_export)
+
+    p = sub.add_parser("parse", help="解析采集文件生成布线表")
+    p.add_argument("--input", help="采集文件目录(默认为 工作目录/lldp_data)")
+    add_parse_arguments(p, "-p", "--processes")
+    p.set_defaults(func=run_parse)
+
+    p = sub.add_parser("config", help="根据互联表生成配置")
+    p.add_argument("-e", "--excel", required=True, help="互联表Excel")
+    p.add_argument("--templates", help="Jinja2模板目录(默认为 工作目录/templates)")
+    p.set_defaults(func=run_config)
+
+    for name, func, help_text in [
+        ("topo-pdf", run_topo_pdf, "生成PDF拓扑图"),
+        ("topo-html", run_topo_html, "生成HTML拓扑图"),
+    ]:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("-e", "--excel", required=True, help="互联表Excel")
+        p.set_defaults(func=func)
+
+    p = sub.add_parser("pipeline", help="采集→解析→配置→拓扑 全流程")
+    add_collect_arguments(p)
+    p.add_argument("--templates", help="Jinja2模板目录(默认为 工作目录/templates)")
+    add_parse_arguments(p, "--parse-processes")
+    p.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="采集全部结束后再解析(默认每台设备采集完立即解析)",
+    )
+    p.add_argument(
+        "--skip",
+        nargs="*",
+        default=[],
+        choices=["config", "topo-pdf", "topo-html"],
+        help="跳过的阶段",
+    )
+    p.set_defaults(func=run_pipeline)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.base_dir = os.path.abspath(args.base_dir)
+    args.output_dir = args.output_dir or os.path.join(args.base_dir, "output")
+    if getattr(args, "templates", None) is None:
+        args.templates = os.path.join(args.base_dir, "templates")
+    try:
+        code, _ = args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        log(f"错误: {e}")
+        return 1
+    return code
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
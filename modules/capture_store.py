@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+采集历史模块 - 每条命令的回显按内容哈希压缩存储(相同内容只存一份)，每次采集保存一份清单，可随时导出为采集文件夹
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+
+
+def format_capture(name, commands, sections):
+    """生成与 lldp_data/<设备名>.txt 相同格式的采集文件内容"""
+    output_content = [f"<{name}>"]
+    for cmd, buffer in zip(commands, sections):
+        output_content.append(f"<{name}>{cmd}")
+        output_content.append(buffer)
+    return "\n".join(output_content)
+
+
+class CaptureStore:
+    """目录结构：objects/<哈希前2位>/<哈希其余部分> 为zlib压缩的回显，runs/<运行ID>.json 为该次采集的清单"""
+
+    COMPRESS_LEVEL = 6
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.runs_dir = os.path.join(root, "runs")
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def put(self, text):
+        """返回(哈希, 是否新写入)；内容已存在时不再写入"""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(zlib.compress(data, self.COMPRESS_LEVEL))
+        os.replace(tmp_file, path)
+        return digest, True
+
+    def get(self, digest):
+        with open(self.object_path(digest), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    def begin_run(self):
+        return CaptureRun(self)
+
+    def list_runs(self):
+        try:
+            names = os.listdir(self.runs_dir)
+        except OSError:
+            return []
+        return sorted(n[:-5] for n in names if n.endswith(".json"))
+
+    def load_manifest(self, run_id):
+        with open(
+            os.path.join(self.runs_dir, f"{run_id}.json"), "r", encoding="utf-8"
+        ) as f:
+            return json.load(f)
+
+    def write_manifest(self, manifest):
+        os.makedirs(self.runs_dir, exist_ok=True)
+        run_id = base_id = manifest["run"]
+        n = 1
+        while os.path.exists(os.path.join(self.runs_dir, f"{run_id}.json")):
+            n += 1
+            run_id = f"{base_id}_{n}"
+        manifest["run"] = run_id
+        path = os.path.join(self.runs_dir, f"{run_id}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+        return run_id
+
+    def export(self, output_dir, run_id=None):
+        """把某次(默认最近一次)采集还原为采集文件夹，返回(运行ID, 设备数)"""
+        runs = self.list_runs()
+        if not runs:
+            raise ValueError("没有采集历史")
+        run_id = run_id or runs[-1]
+        manifest = self.load_manifest(run_id)
+        os.makedirs(output_dir, exist_ok=True)
+        for name, entry in manifest["devices"].items():
+            commands = [cmd for cmd, _ in entry["sections"]]
+            sections = [self.get(digest) for _, digest in entry["sections"]]
+            with open(
+                os.path.join(output_dir, f"{name}.txt"), "w", encoding="utf-8"
+            ) as f:
+                f.write(format_capture(name, commands, sections))
+        return run_id, len(manifest["devices"])
+
+
+class CaptureRun:
+    """一次采集的清单，可在多个线程中同时添加设备"""
+
+    def __init__(self, store):
+        self.store = store
+        self.devices = {}
+        self.new_objects = 0
+        self.sections = 0
+        self._lock = threading.Lock()
+
+    def add(self, name, vendor, commands, sections):
+        entries, created = [], 0
+        for cmd, buffer in zip(commands, sections):
+            digest, is_new = self.store.put(buffer)
+            entries.append([cmd, digest])
+            created += is_new
+        with self._lock:
+            self.devices[name] = {
+                "vendor": vendor,
+                "time": time.time(),
+                "sections": entries,
+            }
+            self.new_objects += created
+            self.sections += len(entries)
+
+    def state(self):
+        """供子进程回传，由父进程merge()合并"""
+        return self.devices, self.new_objects, self.sections
+
+    def merge(self, state):
+        devices, new_objects, sections = state
+        with self._lock:
+            self.devices.update(devices)
+            self.new_objects += new_objects
+            self.sections += sections
+
+    def commit(self, keep=()):
+        """写入本次清单；keep中本次未采集的设备沿用上一次清单中的记录，使每份清单都是完整快照"""
+        devices = dict(self.devices)
+        runs = self.store.list_runs()
+        if runs and keep:
+            previous = self.store.load_manifest(runs[-1])["devices"]
+            for name in keep:
+                if name not in devices and name in previous:
+                    devices[name] = previous[name]
+        return self.store.write_manifest(
+            {
+                "run": datetime.now().strftime("%Y%m%d_%H%M%S"),
+                "time": time.time(),
+                "collected": len(self.devices),
+                "devices": devices,
+            }
+        )
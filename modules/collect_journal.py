@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+采集日志模块 - 预写式记录每台设备的最终采集结果，程序或主机中途退出后可据此断点续采
+"""
+
+import json
+import os
+import time
+
+
+class CollectJournal:
+    """每条记录为一行JSON，单次write追加并fsync；多进程分片可同时追加同一文件"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def start(self, resume=False, **meta):
+        """resume为False时清空旧记录开始新一轮，否则在上一轮记录后继续追加"""
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        if not resume:
+            flags |= os.O_TRUNC
+        self.fd = os.open(self.path, flags, 0o644)
+        self.write({"event": "resume" if resume else "start", **meta})
+
+    def open(self):
+        """子进程追加写入父进程已开始的日志"""
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+
+    def record(self, name, success, kind=None, attempts=1):
+        entry = {"name": name, "status": "success" if success else "failed"}
+        if kind:
+            entry["kind"] = kind
+        entry["attempts"] = attempts
+        self.write(entry)
+
+    def write(self, entry):
+        entry["time"] = round(time.time(), 3)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        os.write(self.fd, line.encode("utf-8"))
+        os.fsync(self.fd)
+
+    def load_done(self):
+        """已记录为成功的设备名集合；进程中断时写了一半的末行直接忽略"""
+        done = set()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get("status") == "success":
+                        done.add(entry["name"])
+        except OSError:
+            pass
+        return done
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
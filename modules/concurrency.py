@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+自适应并发模块 - 按连接/认证耗时与失败情况加性增、乘性减(AIMD)调整在途会话数
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+class AIMDController:
+    """
+    慢启动阶段每成功一次并发+1；首次回退后进入拥塞避免，每成功"当前并发数"次才+1。
+    连接+认证耗时超过基线的latency_factor倍时不再增加；最近window次连接中拥塞失败占比达到threshold
+    (且至少min_samples次)时并发乘以decrease，个别设备不可达不会触发回退。拥塞失败指超时，
+    以及此前认证成功过的设备出现的认证失败(认证服务器过载)，从未成功的设备认证失败视为密码错误。
+    回退后清空窗口重新统计，cooldown内不重复回退。
+    """
+
+    def __init__(
+        self,
+        max_limit,
+        initial=10,
+        min_limit=1,
+        decrease=0.5,
+        latency_factor=2.0,
+        cooldown=2.0,
+        window=20,
+        threshold=0.3,
+        min_samples=10,
+        on_change=None,
+    ):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = max(self.min_limit, min(initial, self.max_limit))
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.on_change = on_change
+        self.baseline = None
+        self.slow_start = True
+        self._credit = 0
+        self._last_decrease = 0
+        self._samples = deque(maxlen=window)
+        self._authed = set()
+        self._lock = threading.Lock()
+
+    def on_success(self, latency, device=None):
+        with self._lock:
+            self._samples.append(False)
+            if device is not None:
+                self._authed.add(device)
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                self.baseline += (latency - self.baseline) * 0.01
+            if latency > self.baseline * self.latency_factor:
+                return
+            if self.slow_start:
+                self._set(self.limit + 1, "连接/认证耗时正常")
+                return
+            self._credit += 1
+            if self._credit >= self.limit:
+                self._credit = 0
+                self._set(self.limit + 1, "连接/认证耗时正常")
+
+    def on_failure(self, kind, device=None):
+        with self._lock:
+            congested = kind == "timeout" or (kind == "auth" and device in self._authed)
+            self._samples.append(congested)
+            if not congested or len(self._samples) < self.min_samples:
+                return
+            if sum(self._samples) < len(self._samples) * self.threshold:
+                return
+            now = time.time()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._samples.clear()
+            self.slow_start = False
+            self._credit = 0
+            reason = "连接超时" if kind == "timeout" else "认证失败"
+            self._set(int(self.limit * self.decrease), reason)
+
+    def _set(self, value, reason):
+        value = max(self.min_limit, min(value, self.max_limit))
+        if value == self.limit:
+            return
+        old, self.limit = self.limit, value
+        if self.on_change:
+            self.on_change(old, value, reason)
+
+
+class AdaptiveGate:
+    """线程模式下按控制器当前并发放行"""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.active = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.active >= self.controller.limit:
+                self._cond.wait(0.5)
+            self.active += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+
+class AsyncAdaptiveGate:
+    """asyncio模式下按控制器当前并发放行"""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.active = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.controller.limit)
+            self.active += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
@@ -3,25 +3,12 @@
 配置生成模块 - 根据Excel互联表生成设备配置
 """
 
-import pandas as pd
-from jinja2 import Environment, FileSystemLoader
 import os
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
-from datetime import datetime
 import ttkbootstrap as ttk
 
-
-def strip_all_string_columns(df):
-    return df.map(lambda x: str(x).strip() if pd.notnull(x) else "")
-
-
-def parse_ip_mask(ip_str):
-    s = str(ip_str).strip()
-    if not s or s.lower() == "nan" or "/" not in s:
-        return s if s.lower() != "nan" else "", ""
-    parts = s.split("/")
-    return parts[0], parts[1]
+from modules.config_generator_core import ConfigGenerator
 
 
 class ConfigGeneratorPanel:
@@ -161,97 +148,12 @@ class ConfigGeneratorPanel:
 
     def run_generate(self, excel_path, template_dir):
         try:
-            output_dir = os.path.join(self.base_dir, "output")
-            os.makedirs(output_dir, exist_ok=True)
-
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = os.path.join(output_dir, f"全部设备配置汇总_{timestamp}.txt")
-
-            df_links = pd.read_excel(
-                excel_path, sheet_name="连线信息", dtype=str
-            ).dropna(how="all")
-            df_links = strip_all_string_columns(df_links)
-
-            try:
-                df_devices = pd.read_excel(
-                    excel_path, sheet_name="设备信息", dtype=str
-                ).dropna(how="all")
-                df_devices = strip_all_string_columns(df_devices)
-                device_dict = df_devices.set_index("设备名称").to_dict("index")
-            except:
-                device_dict = {}
-
-            processed_interfaces = []
-            for index, row in df_links.iterrows():
-                item = row.to_dict()
-                if not item.get("本端设备") or not item.get("本端接口"):
-                    continue
-
-                item["本端IPv4"], item["本端IPv4掩码"] = parse_ip_mask(
-                    item.get("本端IPv4地址", "")
-                )
-                item["本端IPv6"], item["本端IPv6掩码"] = parse_ip_mask(
-                    item.get("本端IPv6地址", "")
-                )
-                item["对端IPv4_仅IP"], _ = parse_ip_mask(item.get("对端IPv4地址", ""))
-                item["对端IPv6_仅IP"], _ = parse_ip_mask(item.get("对端IPv6地址", ""))
-                item["对端管理IP"] = str(
-                    device_dict.get(item.get("对端设备", ""), {}).get(
-                        "管理IP", "未知IP"
-                    )
-                ).strip()
-
-                processed_interfaces.append(item)
-
-            df_processed = pd.DataFrame(processed_interfaces)
-            env = Environment(
-                loader=FileSystemLoader(template_dir),
-                trim_blocks=True,
-                lstrip_blocks=True,
+            generator = ConfigGenerator(
+                os.path.join(self.base_dir, "output"), log_callback=self.log
             )
+            count, output_file = generator.generate(excel_path, template_dir)
 
-            count = 0
-            all_configs = []
-
-            self.log("=" * 50)
-            self.log("开始生成配置...")
-            self.log("=" * 50)
-
-            for device_name, group in df_processed.groupby("本端设备"):
-                vendor = str(device_dict.get(device_name, {}).get("厂商", "")).strip()
-                if not vendor:
-                    for col in ["华为", "华三", "锐捷", "H3C", "Huawei"]:
-                        if (
-                            col in device_name.upper()
-                            or col.upper() in device_name.upper()
-                        ):
-                            vendor = col
-                            break
-                    if not vendor:
-                        vendor = "华三"
-
-                context = {
-                    "device_info": device_dict.get(
-                        device_name, {"设备名称": device_name, "厂商": vendor}
-                    ),
-                    "interfaces": group.to_dict("records"),
-                }
-                context["device_info"]["设备名称"] = device_name
-
-                self.log(f"\n>>> 正在渲染设备: {device_name} (厂商: {vendor})")
-
-                try:
-                    template = env.get_template(vendor + ".txt")
-                    all_configs.append(template.render(context).strip() + "\n\n")
-                    count += 1
-                except Exception as e:
-                    self.log(f"  渲染出错: {e}")
-
-            if all_configs:
-                with open(output_file, "w", encoding="utf-8") as f:
-                    f.writelines(all_configs)
-                self.log(f"\n生成成功！共 {count} 台设备")
-                self.log(f"文件保存至: {output_file}")
+            if output_file:
                 self.parent_frame.after(
                     0,
                     lambda: messagebox.showinfo(
@@ -260,7 +162,6 @@ class ConfigGeneratorPanel:
                     ),
                 )
             else:
-                self.log("\n未生成任何配置")
                 self.parent_frame.after(
                     0, lambda: messagebox.showwarning("警告", "未生成任何配置文件")
                 )
@@ -268,7 +169,7 @@ class ConfigGeneratorPanel:
         except Exception as e:
             self.log(f"\n错误: {e}")
             self.parent_frame.after(
-                0, lambda: messagebox.showerror("错误", f"生成失败：{e}")
+                0, lambda e=e: messagebox.showerror("错误", f"生成失败：{e}")
             )
         finally:
             self.parent_frame.after(0, lambda: self.run_btn.config(state=tk.NORMAL))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+采集耗时历史模块 - 按设备保存历史采集耗时的指数加权平均，用于最长任务优先(LPT)排序与批次耗时预估
+"""
+
+import heapq
+import json
+import os
+
+
+def predict_makespan(durations, workers):
+    """按给定顺序把任务依次交给最先空闲的worker，返回全部完成的时间"""
+    finish = [0.0] * max(1, min(workers, len(durations)))
+    for d in durations:
+        heapq.heapreplace(finish, finish[0] + d)
+    return max(finish)
+
+
+class DurationHistory:
+    ALPHA = 0.3
+
+    def __init__(self, path):
+        self.path = path
+        self.durations = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        tmp_file = self.path + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.durations, f, ensure_ascii=False)
+        os.replace(tmp_file, self.path)
+
+    def update(self, timings):
+        """只记录成功且新建会话的采集，失败与复用会话的耗时不代表设备本身的采集时长"""
+        for t in timings:
+            if not t.success or t.reused:
+                continue
+            old = self.durations.get(t.name)
+            if old is None:
+                self.durations[t.name] = round(t.total, 3)
+            else:
+                self.durations[t.name] = round(
+                    self.ALPHA * t.total + (1 - self.ALPHA) * old, 3
+                )
+
+    def estimates(self, devices):
+        """无历史记录的设备按已知设备的中位数估计"""
+        known = sorted(
+            self.durations[d["设备名称"]]
+            for d in devices
+            if d["设备名称"] in self.durations
+        )
+        default = known[len(known) // 2] if known else 0.0
+        return [self.durations.get(d["设备名称"], default) for d in devices], len(known)
+
+    def schedule(self, devices, workers):
+        """返回(按预计耗时从长到短排序的设备, 有历史记录的台数, 预计总耗时)"""
+        estimates, known = self.estimates(devices)
+        order = sorted(range(len(devices)), key=lambda i: -estimates[i])
+        durations = [estimates[i] for i in order]
+        return (
+            [devices[i] for i in order],
+            known,
+            predict_makespan(durations, workers),
+        )
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+快速解析模块 - 常用LLDP与接口命令的专用解析器，逐条对应ntc_templates中的TextFSM模板规则，
+输出与net_inspect的parse_result相同的行字典；未覆盖的厂商、命令或回显由调用方回退到net_inspect
+"""
+
+import re
+
+IPV4 = r"\d+\.\d+\.\d+\.\d+"
+
+
+class FallBack(Exception):
+    """回显中出现模板会报错的内容，交由net_inspect处理"""
+
+
+class RuleSet:
+    """把模板中会赋值或改变状态的规则按原顺序合并为一个正则，每行只匹配一次，结果与逐条尝试相同"""
+
+    def __init__(self, rules):
+        parts, self.actions = [], {}
+        group = 1
+        for pattern, action in rules:
+            groups = re.compile(pattern).groups
+            parts.append(f"({pattern})")
+            self.actions[group] = (action, groups > 0)
+            group += 1 + groups
+        self.regex = re.compile("|".join(parts))
+
+    def match(self, line):
+        """返回(规则动作, 捕获的值)，未命中时动作为None"""
+        m = self.regex.match(line)
+        if m is None:
+            return None, None
+        action, has_value = self.actions[m.lastindex]
+        return action, m.group(m.lastindex + 1) if has_value else None
+
+
+def new_row(fields, list_field=None):
+    row = dict.fromkeys(fields, "")
+    if list_field:
+        row[list_field] = []
+    return row
+
+
+def record(rows, row, required):
+    """TextFSM的Record：必填字段有值时才输出，调用方随后换用新的空记录"""
+    if row[required]:
+        rows.append(row)
+
+
+# huawei_vrp_display_lldp_neighbor.textfsm
+HUAWEI_LLDP_FIELDS = (
+    "local_interface",
+    "chassis_id",
+    "manufacturer_name",
+    "model_name",
+    "neighbor_port_id",
+    "neighbor_interface",
+    "neighbor",
+    "system_description",
+    "capabilities",
+    "management_ip",
+    "vlan",
+    "serial",
+)
+
+HUAWEI_LLDP_RULES = RuleSet(
+    [
+        (r"^(\S+)\s+has\s+\d+\s+neighbors:$", "local_interface"),
+        (r"^(\S+)\s+has\s+\d+\s+neighbor\(s\):$", "local_interface"),
+        (r"^Chassis\s+ID\s+:(.+?)$", "chassis_id"),
+        (r"^Port\s+ID\s+:(.*?)\s*$", "neighbor_port_id"),
+        (r"^Port\s+description\s+:(.*?)\s*$", "neighbor_interface"),
+        (r"^System\s+name\s+:(.+?)\s*$", "neighbor"),
+        (r"^System\s+description\s+:(.*)", "system_description"),
+        (r"^System\s+capabilities\s+enabled\s+:(.*?)\s*$", "capabilities"),
+        (r"^Management\s+address\s+(?:value\s+)?:\s*(\S+)", "management_ip"),
+        (r"^Port\s+VLAN\s+ID\(PVID\)\s+:(\d+)", "vlan"),
+        (r"^MED\s+Device\s+information", "med"),
+    ]
+)
+HUAWEI_LLDP_NEW_PORT = re.compile(r"^\S+\s+has\s+\d+\s+neighbor")
+HUAWEI_LLDP_DESCRIPTION_END = re.compile(
+    r"^Management|^System\s+capabilities\s+supported"
+)
+
+
+def parse_huawei_lldp_neighbor(text):
+    rows = []
+    row = new_row(HUAWEI_LLDP_FIELDS, "system_description")
+    in_description = False
+    for line in text.splitlines():
+        if in_description:
+            if HUAWEI_LLDP_DESCRIPTION_END.match(line):
+                in_description = False
+            else:
+                row["system_description"].append(line)
+            continue
+        if HUAWEI_LLDP_NEW_PORT.match(line):
+            record(rows, row, "local_interface")
+            row = new_row(HUAWEI_LLDP_FIELDS, "system_description")
+        field, value = HUAWEI_LLDP_RULES.match(line)
+        if field is None:
+            continue
+        if field == "med":
+            # MED状态中遇到未知行时模板报错，这里不再模拟
+            raise FallBack(line)
+        if field == "system_description":
+            row[field].append(value)
+            in_description = True
+        else:
+            row[field] = value
+    record(rows, row, "local_interface")
+    return rows
+
+
+# hp_comware_display_lldp_neighbor-information_verbose.textfsm
+H3C_LLDP_FIELDS = (
+    "local_interface",
+    "chassis_id",
+    "neighbor_port_id",
+    "neighbor_interface",
+    "neighbor",
+    "management_ip",
+    "vlan",
+)
+
+H3C_LLDP_RULES = RuleSet(
+    [
+        (r"^The\s+LLDP\s+service\s+is\s+not\s+running", "eof"),
+        (
+            r"^LLDP\s+neighbor-information\s+of\s+port\s+\d+\[(\S+)\]",
+            "local_interface",
+        ),
+        (r"^\s+Chassis\s+ID\s+:\s+(\S+)", "chassis_id"),
+        (r"^\s+Port\s+ID\s+:\s+(.*)", "neighbor_port_id"),
+        (r"^\s+Port\s+description\s+:\s+(.*)", "neighbor_interface"),
+        (r"^\s+System\s+name\s+:\s+(\S+)", "neighbor"),
+        (r"^\s+Management\s+address\s+:\s+(\S+)", "management_ip"),
+        (r"^\s+Port\s+VLAN\s+ID\(PVID\)\s+:\s+(\d+)", "vlan"),
+        (r"^\s+Maximum\s+frame\s+size", "record"),
+    ]
+)
+
+
+def parse_h3c_lldp_verbose(text):
+    rows = []
+    row = new_row(H3C_LLDP_FIELDS)
+    for line in text.splitlines():
+        field, value = H3C_LLDP_RULES.match(line)
+        if field is None:
+            continue
+        if field == "eof":
+            break
+        if field == "record":
+            record(rows, row, "local_interface")
+            row = new_row(H3C_LLDP_FIELDS)
+        else:
+            row[field] = value
+    record(rows, row, "local_interface")
+    return rows
+
+
+def table_parser(fields, header, patterns, required=()):
+    """每行命中即输出一条记录的表格类模板；header为模板中排在最前、不输出记录的表头规则"""
+    header = re.compile(header)
+    rules = [re.compile(p) for p in patterns]
+
+    def parse(text):
+        rows = []
+        for line in text.splitlines():
+            if header.match(line):
+                continue
+            for regex in rules:
+                m = regex.match(line)
+                if m:
+                    values = m.groupdict()
+                    row = {k: values.get(k) or "" for k in fields}
+                    if all(row[k] for k in required):
+                        rows.append(row)
+                    break
+        return rows
+
+    return parse
+
+
+# huawei_vrp_display_ip_interface_brief.textfsm
+parse_huawei_ip_interface_brief = table_parser(
+    ("interface", "ip", "mask", "physical", "protocol"),
+    r"^Interface\s+IP.*",
+    [
+        rf"^(?P<interface>\S+)\s+(?P<ip>{IPV4}|unassigned)/(?P<mask>\d+)\s+(?P<physical>\S+)\s+(?P<protocol>\S+)",
+        rf"^(?P<interface>\S+)\s+(?P<ip>{IPV4}|unassigned)\s+(?P<physical>\S+)\s+(?P<protocol>\S+)",
+    ],
+)
+
+# hp_comware_display_ip_interface_brief.textfsm
+parse_h3c_ip_interface_brief = table_parser(
+    ("interface", "ip", "physical", "protocol"),
+    r"^Interface\s+Physical",
+    [
+        rf"^(?P<interface>\S+)\s+(?P<physical>\S+)\s+(?P<protocol>\S+)\s+(?P<ip>{IPV4}|--)"
+    ],
+)
+
+# ruijie_os_show_ip_interface_brief.textfsm
+parse_ruijie_ip_interface_brief = table_parser(
+    ("interface", "ip", "mask", "status", "protocol"),
+    r"^Interface\s+IP-Address",
+    [
+        rf"^(?P<interface>\w+\s\S+)\s+(?P<ip>{IPV4}|no address)/(?P<mask>\d+)\s+(?:no address|\S+)\s+(?P<status>\S+)\s+(?P<protocol>\S+)",
+        rf"^(?P<interface>\w+\s\S+)\s+(?P<ip>{IPV4}|no address)\s+(?:no address|\S+)\s+(?P<status>\S+)\s+(?P<protocol>\S+)",
+    ],
+    required=("interface", "ip"),
+)
+
+# (net_inspect平台, 完整命令): 解析函数；缩写命令不在此列，回退到net_inspect
+FAST_PARSERS = {
+    ("huawei_vrp", "display lldp neighbor"): parse_huawei_lldp_neighbor,
+    (
+        "hp_comware",
+        "display lldp neighbor-information verbose",
+    ): parse_h3c_lldp_verbose,
+    ("huawei_vrp", "display ip interface brief"): parse_huawei_ip_interface_brief,
+    ("hp_comware", "display ip interface brief"): parse_h3c_ip_interface_brief,
+    ("ruijie_os", "show ip interface brief"): parse_ruijie_ip_interface_brief,
+}
+
+
+def fast_parse(device, cmd_name):
+    """返回解析结果；没有对应的快速解析器、回显无效或解析为空时返回None，由调用方使用net_inspect的结果"""
+    command = device.search_cmd(cmd_name)
+    if not command:
+        return None
+    parser = FAST_PARSERS.get((device.vendor.PLATFORM, command.command))
+    if parser is None or not command.check_valid(device.vendor.INVALID_STR):
+        return None
+    try:
+        return parser(command.content) or None
+    except FallBack:
+        return None
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+设备清单模块 - 从Excel/CSV/YAML/SQLite读取已启用设备，解析结果按文件路径、修改时间与大小缓存
+"""
+
+import csv
+import hashlib
+import os
+import pickle
+import sqlite3
+
+SHEET_NAME = "设备清单"
+ENABLED_COLUMN = "启用"
+ENABLED_VALUE = "是"
+# 登录凭据原样保留，首尾空格可能是密码的一部分
+CREDENTIAL_COLUMNS = ("用户名", "密码")
+# 清单读取规则变化时旧缓存整体失效
+CACHE_VERSION = 2
+
+
+def _text(value, strip=True):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() if strip else str(value)
+
+
+def _device(items):
+    """设备名称、管理IP、厂商、启用等标识列去除首尾空白，凭据列保持原值"""
+    dev = {}
+    for key, value in items:
+        key = _text(key)
+        if key:
+            dev[key] = _text(value, key not in CREDENTIAL_COLUMNS)
+    return dev
+
+
+def _rows_to_devices(header, rows):
+    for row in rows:
+        dev = _device(zip(header, row))
+        if any(v.strip() for v in dev.values()):
+            yield dev
+
+
+def read_excel(path):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb[SHEET_NAME].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield from _rows_to_devices(header, rows)
+    finally:
+        wb.close()
+
+
+def read_csv(path):
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = csv.reader(f)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield from _rows_to_devices(header, rows)
+
+
+def read_yaml(path):
+    """支持设备字典列表，或 {设备清单: [...]} 形式"""
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or []
+    if isinstance(data, dict):
+        data = data.get(SHEET_NAME, [])
+    for item in data:
+        dev = _device(item.items())
+        if any(v.strip() for v in dev.values()):
+            yield dev
+
+
+def read_sqlite(path):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(f'SELECT * FROM "{SHEET_NAME}"')
+        header = [d[0] for d in cursor.description]
+        yield from _rows_to_devices(header, cursor)
+    finally:
+        conn.close()
+
+
+READERS = {
+    ".xlsx": read_excel,
+    ".xlsm": read_excel,
+    ".csv": read_csv,
+    ".yaml": read_yaml,
+    ".yml": read_yaml,
+    ".db": read_sqlite,
+    ".sqlite": read_sqlite,
+    ".sqlite3": read_sqlite,
+}
+
+
+def load_devices(path, cache_dir=None):
+    """返回已启用的设备列表(值均为字符串，凭据列以外去除首尾空白)；指定cache_dir时命中缓存则不再解析源文件。
+    缓存中含登录密码，文件权限为仅当前用户可读写"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS:
+        raise ValueError(f"不支持的设备清单格式: {ext or path}")
+
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (CACHE_VERSION, path, st.st_mtime_ns, st.st_size)
+    cache_file = None
+    if cache_dir:
+        digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+        cache_file = os.path.join(cache_dir, f"inventory_{digest}.pkl")
+        try:
+            with open(cache_file, "rb") as f:
+                cached = pickle.load(f)
+            if cached["key"] == key:
+                return cached["devices"]
+        except (OSError, pickle.PickleError, EOFError, KeyError, TypeError):
+            pass
+
+    devices = [
+        dev for dev in READERS[ext](path) if dev.get(ENABLED_COLUMN) == ENABLED_VALUE
+    ]
+
+    if cache_file:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = cache_file + ".tmp"
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({"key": key, "devices": devices}, f)
+        os.replace(tmp_file, cache_file)
+    return devices
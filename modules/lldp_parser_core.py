@@ -0,0 +1,516 @@
+# -*- coding: utf-8 -*-
+"""
+LLDP解析核心 - 解析采集文件生成Excel布线表（不依赖GUI，可供命令行调用）
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+
+import net_inspect
+from net_inspect import NetInspect
+
+from modules.fast_parsers import fast_parse
+
+# net_inspect 按目录输入时读取的文件类型
+INPUT_EXTENSIONS = (".txt", ".log", ".diag")
+
+LLDP_COMMANDS = (
+    "display lldp neighbor brief",
+    "display lldp neighbor-information list",
+    "show lldp neighbors",
+    "display lldp neighbor",
+    "display lldp neighbor-information verbose",
+)
+
+INTERFACE_COMMANDS = (
+    "display ip interface brief",
+    "display interface brief",
+    "show ip interface brief",
+)
+
+# net_inspect基础信息中型号、版本的来源
+VERSION_COMMANDS = (
+    "display version",
+    "show version",
+)
+
+
+def list_input_files(folder):
+    """与 net_inspect 目录输入相同的文件及顺序"""
+    files = []
+    for root, dirs, names in os.walk(folder):
+        for name in names:
+            if os.path.splitext(name)[-1] in INPUT_EXTENSIONS:
+                files.append(os.path.join(root, name))
+    return files
+
+
+def parse_files(input_folder, output_dir, files):
+    """子进程入口"""
+    return LLDPTextParser(input_folder, output_dir).parse_files(files)
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class LLDPTextParser:
+    MIN_FILES_PER_PROCESS = 50
+    CHUNKS_PER_PROCESS = 4
+    # 提取逻辑或net_inspect版本变化时缓存整体失效
+    CACHE_VERSION = (2, getattr(net_inspect, "__version__", ""))
+    # 生成布线表需要解析的命令，其余采集命令不再解析；设为None时解析全部命令
+    PARSE_COMMANDS = VERSION_COMMANDS + INTERFACE_COMMANDS + LLDP_COMMANDS
+
+    def __init__(self, input_folder, output_dir, log_callback=None, cache_dir=None):
+        self.input_folder = os.path.abspath(input_folder)
+        self.output_dir = output_dir
+        self.log_callback = log_callback
+        self.cache_dir = cache_dir
+        # 边采集边解析(ParseStream)得到的结果，parse_all时与磁盘缓存一起使用
+        self.streamed = {}
+        # (厂商平台, 采集命令) -> 该组设备能匹配到的LLDP/接口命令
+        self._commands = {}
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def log(self, msg):
+        if self.log_callback:
+            self.log_callback(msg)
+        else:
+            print(f"[DEBUG] {msg}")
+
+    def parse_all(self, processes=1):
+        self.log("=" * 60)
+        self.log(f"开始解析文件夹: {self.input_folder}")
+
+        if not os.path.isdir(self.input_folder):
+            return False, f"文件夹不存在: {self.input_folder}"
+
+        txt_files = [f for f in os.listdir(self.input_folder) if f.endswith(".txt")]
+        if not txt_files:
+            return False, f"文件夹中未找到txt文件: {self.input_folder}"
+
+        self.log(f"找到 {len(txt_files)} 个设备文件")
+
+        files = list_input_files(self.input_folder)
+        results = self.parse_cached(files, processes)
+
+        self.log(f"解析完成，设备数量: {len(results)}")
+
+        all_devices = []
+        all_links = []
+        for result in results:
+            for msg in result["messages"]:
+                self.log(msg)
+            all_devices.append(result["device"])
+            all_links.extend(result["links"])
+
+        if not all_devices:
+            return False, "未能成功解析任何设备文件"
+
+        all_links = self._deduplicate_links(all_links)
+
+        success, excel_path = self._save_to_excel(all_devices, all_links)
+
+        if success:
+            self.log(f"\n解析完成: {len(all_devices)} 设备, {len(all_links)} 链路")
+            return True, excel_path
+        else:
+            return False, excel_path
+
+    def parse_cached(self, files, processes):
+        """按文件内容哈希复用上次的提取结果，只解析新增或变化的文件；结果顺序与文件顺序一致"""
+        cache = self.load_cache()
+        cache.update(self.streamed)
+        digests = [file_digest(f) for f in files]
+        pending = [f for f, d in zip(files, digests) if d not in cache]
+        if cache:
+            self.log(
+                f"解析缓存命中 {len(files) - len(pending)} 个文件，需解析 {len(pending)} 个"
+            )
+
+        parsed = {}
+        if pending:
+            processes = max(
+                1, min(processes, len(pending) // self.MIN_FILES_PER_PROCESS)
+            )
+            if processes > 1:
+                self.log(f"正在调用 net_inspect 解析（{processes} 个进程）...")
+                fresh = self.parse_parallel(pending, processes)
+            else:
+                self.log("正在调用 net_inspect 解析...")
+                fresh = self.parse_files(pending)
+            for result in fresh:
+                parsed.setdefault(result.pop("file"), []).append(result)
+
+        entries, results = {}, []
+        for f, d in zip(files, digests):
+            items = cache[d] if d in cache else parsed.get(f, [])
+            entries[d] = items
+            results.extend(items)
+        self.save_cache(entries)
+        return results
+
+    def cache_file(self):
+        digest = hashlib.sha1(self.input_folder.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"parse_{digest}.pkl")
+
+    def load_cache(self):
+        if not self.cache_dir:
+            return {}
+        try:
+            with open(self.cache_file(), "rb") as f:
+                cached = pickle.load(f)
+            if cached["version"] == self.CACHE_VERSION:
+                return cached["entries"]
+        except (OSError, pickle.PickleError, EOFError, KeyError, TypeError):
+            pass
+        return {}
+
+    def save_cache(self, entries):
+        """只保留当前文件夹中仍存在的文件的结果"""
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_file = self.cache_file()
+            with open(cache_file + ".tmp", "wb") as f:
+                pickle.dump({"version": self.CACHE_VERSION, "entries": entries}, f)
+            os.replace(cache_file + ".tmp", cache_file)
+        except OSError as e:
+            self.log(f"保存解析缓存失败: {e}")
+
+    def parse_files(self, files):
+        """用net_inspect解析给定文件，按输入顺序返回每台设备的提取结果"""
+        net = NetInspect()
+        net.set_plugins(input_plugin="console")
+        for file_path in files:
+            net.cluster.input(file_path)
+        if self.PARSE_COMMANDS is not None:
+            for device in net.cluster.devices:
+                self.select_commands(device)
+        net.run_parse()
+        return [self.extract_device(device) for device in net.cluster.devices]
+
+    def select_commands(self, device):
+        """只保留PARSE_COMMANDS模糊匹配到的命令；厂商已在读入文件时识别，基础信息中用不到的CPU、内存等命令随之跳过"""
+        keep = set()
+        for name in self.PARSE_COMMANDS:
+            command = device.search_cmd(name)
+            if command:
+                keep.add(command.command)
+        for command in list(device.cmds):
+            if command not in keep:
+                del device.cmds[command]
+
+    def parse_parallel(self, files, processes):
+        """文件按顺序切成小块分给多个进程解析，按块顺序合并，结果与单进程一致"""
+        size = max(1, -(-len(files) // (processes * self.CHUNKS_PER_PROCESS)))
+        chunks = [files[i : i + size] for i in range(0, len(files), size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for part in executor.map(
+                parse_files,
+                repeat(self.input_folder),
+                repeat(self.output_dir),
+                chunks,
+            ):
+                results.extend(part)
+        return results
+
+    def stream(self, processes=1):
+        return ParseStream(self, processes)
+
+    def extract_device(self, device):
+        """提取单台设备的信息与链路；返回纯字典以便跨进程回传，日志行放在messages中由调用方输出"""
+        hostname = device.info.hostname
+        vendor = device.info.vendor
+        ip = device.info.ip
+        model = device.info.model
+        version = device.info.version
+
+        messages = [
+            f"\n处理设备: {hostname}",
+            f"  厂商: {vendor}, 型号: {model}, IP: {ip}",
+        ]
+
+        device_info = {
+            "hostname": hostname,
+            "vendor": vendor,
+            "ip": ip,
+            "model": model,
+            "version": version,
+            "loopback0": "",
+        }
+
+        intf_ip_map = self._extract_interface_ip(device)
+
+        links = []
+        for lldp_cmd in self.available_commands(device, LLDP_COMMANDS):
+            try:
+                parse_result = self.parse_result(device, lldp_cmd)
+                if parse_result:
+                    messages.append(
+                        f"  找到LLDP命令: {lldp_cmd}, {len(parse_result)} 条记录"
+                    )
+                    links = self._extract_lldp_links(
+                        hostname, parse_result, intf_ip_map
+                    )
+                    messages.append(f"  提取链路: {len(links)} 条")
+                    break
+            except Exception as e:
+                messages.append(f"  命令 '{lldp_cmd}' 解析失败: {e}")
+                continue
+
+        return {
+            "file": device._device_info.file_path,
+            "device": device_info,
+            "links": links,
+            "messages": messages,
+        }
+
+    def parse_result(self, device, cmd_name):
+        """常用命令先用快速解析器，其余回退到net_inspect的TextFSM解析"""
+        rows = fast_parse(device, cmd_name)
+        if rows is None:
+            return device.parse_result(cmd_name)
+        return rows
+
+    def available_commands(self, device, names):
+        """names中能在设备采集内容里匹配到的命令，保持原顺序；
+        同厂商且采集命令相同的设备只模糊匹配一次，其余命令解析结果必为空，不必再逐条尝试"""
+        key = (device.vendor.PLATFORM, tuple(device.cmds), names)
+        found = self._commands.get(key)
+        if found is None:
+            found = self._commands[key] = [
+                name for name in names if device.search_cmd(name)
+            ]
+        return found
+
+    def _extract_interface_ip(self, device):
+        intf_ip_map = {}
+
+        for cmd_name in self.available_commands(device, INTERFACE_COMMANDS):
+            try:
+                parse_result = self.parse_result(device, cmd_name)
+                if parse_result:
+                    for row in parse_result:
+                        intf_name = (
+                            row.get("interface")
+                            or row.get("port")
+                            or row.get("name", "")
+                        )
+                        ip = row.get("ip_address") or row.get("ip") or ""
+                        ipv6 = row.get("ipv6") or ""
+                        vrf = row.get("vrf") or row.get("vpn_instance") or ""
+
+                        if intf_name:
+                            intf_ip_map[intf_name] = {
+                                "ipv4": ip,
+                                "ipv6": ipv6,
+                                "vrf": vrf,
+                            }
+                    if intf_ip_map:
+                        break
+            except:
+                continue
+
+        return intf_ip_map
+
+    def _extract_lldp_links(self, hostname, parse_result, intf_ip_map):
+        links = []
+
+        for row in parse_result:
+            local_port = (
+                row.get("local_interface")
+                or row.get("local_port")
+                or row.get("interface")
+                or row.get("port")
+                or ""
+            ).strip()
+
+            neighbor_dev = (
+                row.get("neighbor")
+                or row.get("neighbor_name")
+                or row.get("remote_device")
+                or row.get("remote_host")
+                or row.get("system_name")
+                or ""
+            ).strip()
+
+            neighbor_port = (
+                row.get("neighbor_port_id")
+                or row.get("neighbor_interface")
+                or row.get("remote_port")
+                or row.get("remote_interface")
+                or row.get("port")
+                or ""
+            ).strip()
+
+            mgmt_ip = (
+                row.get("management_address")
+                or row.get("remote_ip")
+                or row.get("ip")
+                or ""
+            )
+
+            if not local_port or not neighbor_dev:
+                continue
+
+            ip_info = intf_ip_map.get(local_port, {})
+
+            link = {
+                "本端设备": hostname,
+                "本端接口": local_port,
+                "本端IPv4地址": ip_info.get("ipv4", ""),
+                "本端IPv6地址": ip_info.get("ipv6", ""),
+                "本端VPN实例": ip_info.get("vrf", ""),
+                "对端VPN实例": "",
+                "对端IPv6地址": "",
+                "对端IPv4地址": mgmt_ip,
+                "对端接口": neighbor_port,
+                "对端设备": neighbor_dev,
+                "备注": "LLDP自动解析",
+            }
+            links.append(link)
+
+        return links
+
+    def _deduplicate_links(self, links):
+        """两端"设备_接口"按字符串排序后拼成链路键，同一链路保留最先出现的记录；
+        键的生成与查重都按整列进行，百万条链路也只需数秒"""
+        if not links:
+            return links
+
+        def endpoint(device_col, port_col):
+            devices = pd.Series([link[device_col] for link in links], dtype=object)
+            ports = pd.Series([link[port_col] for link in links], dtype=object)
+            return devices.astype(str) + "_" + ports.astype(str)
+
+        a = endpoint("本端设备", "本端接口")
+        b = endpoint("对端设备", "对端接口")
+        swap = a > b
+        keys = a.where(~swap, b) + "-" + b.where(~swap, a)
+        duplicated = keys.duplicated().to_numpy()
+
+        return [link for link, dup in zip(links, duplicated) if not dup]
+
+    def _save_to_excel(self, devices, links):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        excel_path = os.path.join(self.output_dir, f"布线表_{timestamp}.xlsx")
+
+        df_devices = pd.DataFrame(devices)
+        df_devices = df_devices.rename(
+            columns={
+                "hostname": "设备名称",
+                "vendor": "厂商",
+                "ip": "管理IP",
+                "model": "设备型号",
+                "version": "软件版本",
+                "loopback0": "Loopback0",
+            }
+        )
+
+        df_links = pd.DataFrame(links)
+
+        if df_links.empty:
+            df_links = pd.DataFrame(
+                columns=[
+                    "本端设备",
+                    "本端接口",
+                    "本端IPv4地址",
+                    "本端IPv6地址",
+                    "本端VPN实例",
+                    "对端VPN实例",
+                    "对端IPv6地址",
+                    "对端IPv4地址",
+                    "对端接口",
+                    "对端设备",
+                    "备注",
+                ]
+            )
+
+        try:
+            with pd.ExcelWriter(excel_path, engine="openpyxl") as writer:
+                df_links.to_excel(writer, sheet_name="连线信息", index=False)
+                df_devices.to_excel(writer, sheet_name="设备信息", index=False)
+            return True, excel_path
+        except Exception as e:
+            return False, f"保存Excel失败: {e}"
+
+
+class ParseStream:
+    """边采集边解析：采集保存的文件立即交给解析进程，结果按文件哈希记入parser.streamed，
+    采集结束后parse_all只需解析剩余文件并去重生成布线表"""
+
+    MAX_BATCH = 50
+
+    def __init__(self, parser, processes=1):
+        self.parser = parser
+        self.processes = max(1, processes)
+        self.executor = ProcessPoolExecutor(max_workers=self.processes)
+        self.queue = []
+        self.running = 0
+        self.devices = 0
+        self.links = 0
+        self._cond = threading.Condition(threading.RLock())
+
+    def submit(self, path):
+        """可在多个采集线程中调用；解析进程忙时排队，空闲后整批提交"""
+        path = os.path.abspath(path)
+        digest = file_digest(path)
+        with self._cond:
+            self.queue.append((path, digest))
+            self.dispatch()
+
+    def dispatch(self):
+        while self.queue and self.running < self.processes:
+            batch = self.queue[: self.MAX_BATCH]
+            del self.queue[: self.MAX_BATCH]
+            self.running += 1
+            future = self.executor.submit(
+                parse_files,
+                self.parser.input_folder,
+                self.parser.output_dir,
+                [path for path, _ in batch],
+            )
+            future.add_done_callback(lambda f, batch=batch: self.done(batch, f))
+
+    def done(self, batch, future):
+        try:
+            results = future.result()
+        except Exception as e:
+            self.parser.log(
+                f"边采集边解析出错，{len(batch)} 个文件留待采集结束后解析: {e}"
+            )
+            results = None
+        with self._cond:
+            self.running -= 1
+            if results is not None:
+                parsed = {}
+                for result in results:
+                    parsed.setdefault(result.pop("file"), []).append(result)
+                for path, digest in batch:
+                    items = parsed.get(path, [])
+                    self.parser.streamed[digest] = items
+                    self.devices += len(items)
+                    self.links += sum(len(item["links"]) for item in items)
+                self.parser.log(
+                    f"边采集边解析: 已解析 {self.devices} 台设备，累计 {self.links} 条链路"
+                )
+            self.dispatch()
+            self._cond.notify_all()
+
+    def close(self):
+        """等待已提交的文件全部解析完成"""
+        with self._cond:
+            while self.queue or self.running:
+                self._cond.wait()
+        self.executor.shutdown()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+日志输出模块 - 工作线程只入队，界面按固定间隔批量刷新并只保留最近若干行，完整日志写入滚动文件
+"""
+
+import logging
+import os
+import queue
+import tkinter as tk
+from logging.handlers import RotatingFileHandler
+
+
+class BatchedLogView:
+    FLUSH_INTERVAL = 100
+    MAX_LINES = 5000
+    MAX_BYTES = 10 * 1024 * 1024
+    BACKUP_COUNT = 5
+
+    def __init__(self, widget, log_file=None, max_lines=None, readonly=False):
+        self.widget = widget
+        self.max_lines = max_lines or self.MAX_LINES
+        self.readonly = readonly
+        self._queue = queue.SimpleQueue()
+        self._logger = self._open_logger(log_file) if log_file else None
+        self.widget.after(self.FLUSH_INTERVAL, self._flush)
+
+    def _open_logger(self, log_file):
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        logger = logging.getLogger(f"toolbox.{os.path.abspath(log_file)}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        if not logger.handlers:
+            handler = RotatingFileHandler(
+                log_file,
+                maxBytes=self.MAX_BYTES,
+                backupCount=self.BACKUP_COUNT,
+                encoding="utf-8",
+            )
+            handler.terminator = ""
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        return logger
+
+    def write(self, text):
+        """可在任意线程调用"""
+        self._queue.put(text)
+
+    def clear(self):
+        text = self._drain()
+        if text and self._logger is not None:
+            self._logger.info(text)
+        self._set_state(tk.NORMAL)
+        self.widget.delete(1.0, tk.END)
+        self._set_state(tk.DISABLED)
+
+    def _drain(self):
+        parts = []
+        try:
+            while True:
+                parts.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return "".join(parts)
+
+    def _set_state(self, state):
+        if self.readonly:
+            self.widget.config(state=state)
+
+    def _flush(self):
+        text = self._drain()
+        if text:
+            if self._logger is not None:
+                self._logger.info(text)
+            try:
+                self._set_state(tk.NORMAL)
+                self.widget.insert(tk.END, text)
+                lines = int(self.widget.index("end-1c").split(".")[0])
+                if lines > self.max_lines:
+                    self.widget.delete(1.0, f"{lines - self.max_lines + 1}.0")
+                self.widget.see(tk.END)
+                self._set_state(tk.DISABLED)
+            except tk.TclError:
+                return
+        try:
+            self.widget.after(self.FLUSH_INTERVAL, self._flush)
+        except tk.TclError:
+            pass
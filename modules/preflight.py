@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+采集预检模块 - SSH采集前经代理池异步探测所有设备的TCP/22端口，提前剔除不可达设备
+"""
+
+import asyncio
+
+from modules.socks_pool import ProxyUnavailable
+from modules.ssh_session import classify_error
+
+
+class Preflight:
+    """只剔除明确拒绝连接或不可达的设备；探测超时(含经代理建连超时)不代表设备不可达，视为可达交给SSH阶段及其重试处理"""
+
+    def __init__(self, proxy_pool, port=22, timeout=5, concurrency=500):
+        self.proxy_pool = proxy_pool
+        self.port = port
+        self.timeout = timeout
+        self.concurrency = concurrency
+
+    def run(self, devices):
+        """返回(可达设备列表, [(不可达设备, 异常), ...])"""
+        return asyncio.run(self._run_all(devices))
+
+    async def _run_all(self, devices):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self.proxy_pool.reset_async()
+
+        async def bounded(dev):
+            async with semaphore:
+                try:
+                    await self.probe(dev)
+                    return None
+                except (ProxyUnavailable, asyncio.TimeoutError):
+                    return None
+                except Exception as e:
+                    if classify_error(e) in ("unreachable", "refused"):
+                        return e
+                    return None
+
+        try:
+            results = await asyncio.gather(*(bounded(dev) for dev in devices))
+        finally:
+            self.proxy_pool.close_async()
+
+        alive, dead = [], []
+        for dev, error in zip(devices, results):
+            if error is None:
+                alive.append(dev)
+            else:
+                dead.append((dev, error))
+        return alive, dead
+
+    async def probe(self, dev):
+        endpoint, target = await self.proxy_pool.connect_async(
+            dev, self.port, self.timeout, mark_dead=False
+        )
+        try:
+            reader, writer = await asyncio.wait_for(self._open(target), self.timeout)
+            try:
+                banner = await asyncio.wait_for(reader.readline(), self.timeout)
+            except asyncio.TimeoutError:
+                return
+            finally:
+                writer.close()
+            if not banner:
+                raise ConnectionRefusedError("目标关闭了连接，未返回SSH标识")
+        finally:
+            endpoint.release_async()
+
+    async def _open(self, target):
+        if "sock" in target:
+            try:
+                return await asyncio.open_connection(sock=target["sock"])
+            except BaseException:
+                target["sock"].close()
+                raise
+        if "tunnel" in target:
+            return await target["tunnel"].open_connection(
+                target["host"], target["port"]
+            )
+        return await asyncio.open_connection(target["host"], target["port"])
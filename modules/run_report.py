@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+采集运行报告模块 - 记录每台设备各阶段耗时与接收字节数，批次结束导出JSON/CSV与Prometheus文本格式
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from modules.ssh_session import classify_error
+
+
+class DeviceTiming:
+    """单台设备的计时记录：mark()记录距上一个时间点的耗时，时间基准为time.perf_counter()"""
+
+    def __init__(self, name, ip, vendor):
+        self.name = name
+        self.ip = ip
+        self.vendor = vendor
+        self.proxy = ""
+        self.reused = False
+        self.phases = {}
+        self.commands = []
+        self.success = None
+        self.error = ""
+        self.error_kind = ""
+        self.started = self._last = time.perf_counter()
+        self.total = 0
+
+    def mark(self, phase, at=None):
+        at = time.perf_counter() if at is None else at
+        self.phases[phase] = at - self._last
+        self._last = at
+
+    def command(self, cmd, seconds, size):
+        self.commands.append({"command": cmd, "seconds": seconds, "bytes": size})
+        self._last = time.perf_counter()
+
+    def finish(self, success, error=None):
+        self.success = success
+        if error is not None:
+            self.error = str(error)
+            self.error_kind = classify_error(error)
+        self.total = time.perf_counter() - self.started
+
+    @property
+    def bytes(self):
+        return sum(c["bytes"] for c in self.commands)
+
+    def as_dict(self):
+        return {
+            "device": self.name,
+            "ip": self.ip,
+            "vendor": self.vendor,
+            "proxy": self.proxy,
+            "status": "success" if self.success else "failed",
+            "error": self.error,
+            "error_kind": self.error_kind,
+            "reused": self.reused,
+            "phases": {k: round(v, 4) for k, v in self.phases.items()},
+            "commands": [
+                dict(c, seconds=round(c["seconds"], 4)) for c in self.commands
+            ],
+            "total": round(self.total, 4),
+            "bytes": self.bytes,
+        }
+
+
+class RunReport:
+    """一次批量采集的运行报告"""
+
+    PROM_FILE = "lldp_collect.prom"
+
+    def __init__(self, engine="thread"):
+        self.engine = engine
+        self.devices = []
+        self.skipped = 0
+        self.started = time.time()
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def device(self, name, ip, vendor):
+        """同一设备重试时替换上一次尝试的记录，报告中每台设备只保留最终一次尝试"""
+        timing = DeviceTiming(name, ip, vendor)
+        self.add(timing)
+        return timing
+
+    def add(self, timing):
+        with self._lock:
+            index = self._index.get(timing.name)
+            if index is None:
+                self._index[timing.name] = len(self.devices)
+                self.devices.append(timing)
+            else:
+                self.devices[index] = timing
+
+    def merge(self, timings):
+        """合并分片子进程回传的计时记录"""
+        for timing in timings:
+            self.add(timing)
+
+    def write(self, output_dir):
+        """写出JSON/CSV报告(带时间戳)与Prometheus文件(固定文件名，供textfile采集器读取)，返回写出的路径"""
+        os.makedirs(output_dir, exist_ok=True)
+        json_file, json_path, csv_path = self.open_report(output_dir)
+        prom_path = os.path.join(output_dir, self.PROM_FILE)
+        finished = time.time()
+        rows = [d.as_dict() for d in self.devices if d.success is not None]
+
+        with json_file as f:
+            json.dump(
+                {
+                    "engine": self.engine,
+                    "started": datetime.fromtimestamp(self.started).isoformat(),
+                    "duration": round(finished - self.started, 3),
+                    "success": sum(r["status"] == "success" for r in rows),
+                    "failed": sum(r["status"] == "failed" for r in rows),
+                    "skipped": self.skipped,
+                    "devices": rows,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+        with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["device", "ip", "vendor", "proxy", "status", "reused"]
+                + ["phase", "command", "seconds", "bytes"]
+            )
+            for r in rows:
+                head = [
+                    r["device"],
+                    r["ip"],
+                    r["vendor"],
+                    r["proxy"],
+                    r["status"],
+                    r["reused"],
+                ]
+                for phase, seconds in r["phases"].items():
+                    writer.writerow(head + [phase, "", seconds, ""])
+                for c in r["commands"]:
+                    writer.writerow(
+                        head + ["command", c["command"], c["seconds"], c["bytes"]]
+                    )
+                writer.writerow(head + ["total", "", r["total"], r["bytes"]])
+
+        tmp_path = prom_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus(rows, finished))
+        os.replace(tmp_path, prom_path)
+        return json_path, csv_path, prom_path
+
+    def open_report(self, output_dir):
+        """同一秒内结束的多次采集依次加 _2、_3 后缀，以独占方式创建JSON文件，不会互相覆盖"""
+        timestamp = datetime.fromtimestamp(self.started).strftime("%Y%m%d_%H%M%S")
+        stem, n = f"采集报告_{timestamp}", 1
+        while True:
+            json_path = os.path.join(output_dir, f"{stem}.json")
+            try:
+                json_file = open(json_path, "x", encoding="utf-8")
+                break
+            except FileExistsError:
+                n += 1
+                stem = f"采集报告_{timestamp}_{n}"
+        return json_file, json_path, os.path.join(output_dir, f"{stem}.csv")
+
+    def to_prometheus(self, rows, finished):
+        lines = [
+            "# HELP lldp_collect_devices 本次采集的设备数",
+            "# TYPE lldp_collect_devices gauge",
+        ]
+        for status in ("success", "failed"):
+            count = sum(r["status"] == status for r in rows)
+            lines.append(
+                f"lldp_collect_devices{_labels(engine=self.engine, status=status)} {count}"
+            )
+        lines.append(
+            f"lldp_collect_devices{_labels(engine=self.engine, status='skipped')} {self.skipped}"
+        )
+        lines += [
+            "# HELP lldp_collect_run_seconds 本次采集总耗时",
+            "# TYPE lldp_collect_run_seconds gauge",
+            f"lldp_collect_run_seconds{_labels(engine=self.engine)} {finished - self.started:.3f}",
+            "# HELP lldp_collect_last_run_timestamp_seconds 本次采集结束时间",
+            "# TYPE lldp_collect_last_run_timestamp_seconds gauge",
+            f"lldp_collect_last_run_timestamp_seconds {finished:.0f}",
+        ]
+
+        lines += [
+            "# HELP lldp_collect_device_phase_seconds 单台设备各阶段耗时",
+            "# TYPE lldp_collect_device_phase_seconds gauge",
+        ]
+        totals = {}
+        for r in rows:
+            base = {"device": r["device"], "vendor": r["vendor"], "proxy": r["proxy"]}
+            phases = dict(r["phases"])
+            phases["commands"] = sum(c["seconds"] for c in r["commands"])
+            for phase, seconds in phases.items():
+                lines.append(
+                    f"lldp_collect_device_phase_seconds{_labels(phase=phase, **base)} {seconds}"
+                )
+                key = (r["vendor"], r["proxy"], phase)
+                total = totals.setdefault(key, [0.0, 0])
+                total[0] += seconds
+                total[1] += 1
+
+        lines += [
+            "# HELP lldp_collect_device_bytes 单台设备命令回显字节数",
+            "# TYPE lldp_collect_device_bytes gauge",
+        ]
+        for r in rows:
+            base = {"device": r["device"], "vendor": r["vendor"], "proxy": r["proxy"]}
+            lines.append(f"lldp_collect_device_bytes{_labels(**base)} {r['bytes']}")
+
+        lines += [
+            "# HELP lldp_collect_phase_seconds 按厂商与代理汇总的阶段耗时",
+            "# TYPE lldp_collect_phase_seconds summary",
+        ]
+        for (vendor, proxy, phase), (seconds, count) in sorted(totals.items()):
+            labels = _labels(vendor=vendor, proxy=proxy, phase=phase)
+            lines.append(f"lldp_collect_phase_seconds_sum{labels} {seconds:.4f}")
+            lines.append(f"lldp_collect_phase_seconds_count{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+"""
+代理池模块 - 多个SOCKS5代理/SSH跳板机端点的路由、并发限制、健康检查与故障切换
+"""
+
+import asyncio
+import configparser
+import ipaddress
+import os
+import socket
+import struct
+import threading
+import time
+
+import paramiko
+import socks
+
+from modules.ssh_session import classify_error
+
+
+SOCKS5_ERRORS = {
+    1: "代理服务器一般性错误",
+    2: "规则不允许连接",
+    3: "网络不可达",
+    4: "主机不可达",
+    5: "连接被拒绝",
+    6: "TTL超时",
+    7: "不支持的命令",
+    8: "不支持的地址类型",
+}
+
+# 跳板机打开direct-tcpip通道失败的原因码(RFC 4254)与SOCKS5应答码编号不同，单独映射为失败分类
+SSH_OPEN_FAILURE_KINDS = {
+    1: "unreachable",  # ADMINISTRATIVELY_PROHIBITED：跳板机策略不允许连接该目标
+    3: "other",  # UNKNOWN_CHANNEL_TYPE：跳板机不支持端口转发
+    4: "timeout",  # RESOURCE_SHORTAGE：跳板机过载，按超时处理以触发降并发与重试
+}
+
+
+class ProxyUnavailable(ConnectionError):
+    """代理端点本身不可用（连不上代理、握手失败），应切换到下一个代理"""
+
+
+class ProxyTargetError(ConnectionError):
+    """代理可用，但代理到目标设备的连接失败；code为SOCKS5应答码，kind为已确定的失败分类"""
+
+    def __init__(self, message, code=None, kind=None):
+        super().__init__(message)
+        self.code = code
+        self.kind = kind
+
+
+def channel_failure_kind(error):
+    """CONNECT_FAILED(2)按跳板机回传的原因文本区分拒绝、超时与不可达"""
+    if error.code in SSH_OPEN_FAILURE_KINDS:
+        return SSH_OPEN_FAILURE_KINDS[error.code]
+    kind = classify_error(ConnectionError(error.text))
+    return "unreachable" if kind == "other" else kind
+
+
+async def _recv_exactly(loop, sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = await loop.sock_recv(sock, size - len(data))
+        if not chunk:
+            raise ProxyUnavailable("SOCKS5代理意外关闭连接")
+        data += chunk
+    return data
+
+
+async def _socks5_handshake(loop, sock, dest_host, dest_port):
+    await loop.sock_sendall(sock, b"\x05\x01\x00")
+    if await _recv_exactly(loop, sock, 2) != b"\x05\x00":
+        raise ProxyUnavailable("SOCKS5代理握手失败")
+
+    try:
+        addr = ipaddress.ip_address(dest_host)
+        atyp = b"\x01" if addr.version == 4 else b"\x04"
+        dest = atyp + addr.packed
+    except ValueError:
+        name = dest_host.encode("idna")
+        dest = b"\x03" + bytes([len(name)]) + name
+    await loop.sock_sendall(sock, b"\x05\x01\x00" + dest + struct.pack("!H", dest_port))
+
+    ver, rep, _, atyp = await _recv_exactly(loop, sock, 4)
+    if ver != 5 or rep == 1:
+        raise ProxyUnavailable(f"SOCKS5代理异常: {SOCKS5_ERRORS.get(rep, rep)}")
+    if rep != 0:
+        raise ProxyTargetError(
+            f"SOCKS5代理连接目标失败: {SOCKS5_ERRORS.get(rep, rep)}", rep
+        )
+    if atyp == 1:
+        await _recv_exactly(loop, sock, 4 + 2)
+    elif atyp == 4:
+        await _recv_exactly(loop, sock, 16 + 2)
+    else:
+        (length,) = await _recv_exactly(loop, sock, 1)
+        await _recv_exactly(loop, sock, length + 2)
+
+
+async def open_socks5_socket(proxy_host, proxy_port, dest_host, dest_port, timeout):
+    """经SOCKS5代理建立到目标的非阻塞TCP连接，返回已连接的socket"""
+    loop = asyncio.get_running_loop()
+    try:
+        family, type_, proto, _, addr = (
+            await loop.getaddrinfo(proxy_host, proxy_port, type=socket.SOCK_STREAM)
+        )[0]
+    except OSError as e:
+        raise ProxyUnavailable(f"无法解析代理地址 {proxy_host}: {e}") from e
+    sock = socket.socket(family, type_, proto)
+    sock.setblocking(False)
+    try:
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, addr), timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise ProxyUnavailable(
+                f"无法连接代理 {proxy_host}:{proxy_port}: {e!r}"
+            ) from e
+        await asyncio.wait_for(
+            _socks5_handshake(loop, sock, dest_host, dest_port), timeout
+        )
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+class ProxyEndpoint:
+    DEAD_COOLDOWN = 60
+
+    def __init__(
+        self,
+        name,
+        type="socks5",
+        host="localhost",
+        port=1999,
+        max_sessions=0,
+        subnets=(),
+        regions=(),
+        username="",
+        password="",
+    ):
+        self.name = name
+        self.type = type
+        self.host = host
+        self.port = int(port)
+        self.max_sessions = int(max_sessions)
+        self.subnets = [ipaddress.ip_network(s, strict=False) for s in subnets]
+        self.regions = set(regions)
+        self.username = username
+        self.password = password
+        self.dead_until = 0
+        self.active = 0
+        self._cond = threading.Condition()
+        self._async_sem = None
+        self._jump_transport = None
+        self._jump_conn = None
+        self._jump_lock = threading.Lock()
+
+    def __repr__(self):
+        if self.type == "direct":
+            return f"{self.name}(直连)"
+        return f"{self.name}({self.type}://{self.host}:{self.port})"
+
+    @property
+    def is_default(self):
+        return not self.subnets and not self.regions
+
+    def is_alive(self):
+        return time.time() >= self.dead_until
+
+    def mark_dead(self):
+        self.dead_until = time.time() + self.DEAD_COOLDOWN
+        self.close()
+
+    def mark_alive(self):
+        self.dead_until = 0
+
+    def acquire(self):
+        with self._cond:
+            while self.max_sessions and self.active >= self.max_sessions:
+                self._cond.wait()
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def check(self, timeout=5):
+        """健康检查：能连上代理（SOCKS5还需完成协商）即视为可用"""
+        if self.type == "direct":
+            return True
+        try:
+            with socket.create_connection((self.host, self.port), timeout) as s:
+                if self.type == "socks5":
+                    s.sendall(b"\x05\x01\x00")
+                    if s.recv(2) != b"\x05\x00":
+                        return False
+                else:
+                    if not s.recv(64).startswith(b"SSH-"):
+                        return False
+            return True
+        except OSError:
+            return False
+
+    def open(self, dest_host, dest_port, timeout):
+        """阻塞方式建立经本端点到目标的连接，返回可交给paramiko的socket/通道"""
+        if self.type == "direct":
+            try:
+                return socket.create_connection((dest_host, dest_port), timeout)
+            except OSError as e:
+                raise ProxyTargetError(f"直连目标失败: {e}") from e
+        if self.type == "ssh":
+            transport = self._jump()
+            try:
+                return transport.open_channel(
+                    "direct-tcpip",
+                    (dest_host, dest_port),
+                    ("127.0.0.1", 0),
+                    timeout=timeout,
+                )
+            except paramiko.ChannelException as e:
+                raise ProxyTargetError(
+                    f"跳板机连接目标失败: {e}", kind=channel_failure_kind(e)
+                ) from e
+            except (paramiko.SSHException, OSError) as e:
+                self.close()
+                raise ProxyUnavailable(f"跳板机 {self.name} 不可用: {e}") from e
+
+        sock = socks.socksocket()
+        sock.set_proxy(socks.SOCKS5, self.host, self.port)
+        sock.settimeout(timeout)
+        try:
+            sock.connect((dest_host, dest_port))
+        except socks.ProxyConnectionError as e:
+            sock.close()
+            raise ProxyUnavailable(f"无法连接代理 {self.name}: {e}") from e
+        except socks.SOCKS5Error as e:
+            sock.close()
+            code = int(str(e)[2:4], 16) if str(e).startswith("0x") else None
+            if code == 1:
+                raise ProxyUnavailable(f"代理 {self.name} 异常: {e}") from e
+            raise ProxyTargetError(f"SOCKS5代理连接目标失败: {e}", code) from e
+        except BaseException:
+            sock.close()
+            raise
+        sock.settimeout(None)
+        return sock
+
+    def _jump(self):
+        with self._jump_lock:
+            if self._jump_transport is None or not self._jump_transport.is_active():
+                try:
+                    sock = socket.create_connection((self.host, self.port), 30)
+                    transport = paramiko.Transport(sock)
+                    transport.start_client(timeout=30)
+                    transport.auth_password(self.username, self.password)
+                    transport.set_keepalive(30)
+                except (paramiko.SSHException, OSError) as e:
+                    raise ProxyUnavailable(f"跳板机 {self.name} 不可用: {e}") from e
+                self._jump_transport = transport
+            return self._jump_transport
+
+    def close(self):
+        with self._jump_lock:
+            if self._jump_transport is not None:
+                self._jump_transport.close()
+                self._jump_transport = None
+
+    def reset_async(self):
+        self._async_sem = (
+            asyncio.Semaphore(self.max_sessions) if self.max_sessions else None
+        )
+        self._jump_conn = None
+
+    async def acquire_async(self):
+        if self._async_sem is not None:
+            await self._async_sem.acquire()
+        self.active += 1
+
+    def release_async(self):
+        self.active -= 1
+        if self._async_sem is not None:
+            self._async_sem.release()
+
+    async def open_async(self, dest_host, dest_port, timeout):
+        """异步建立连接，返回传给asyncssh.connect的关键字参数"""
+        if self.type == "direct":
+            return {"host": dest_host, "port": dest_port, "connect_timeout": timeout}
+        if self.type == "ssh":
+            import asyncssh
+
+            if self._jump_conn is None:
+                try:
+                    self._jump_conn = await asyncssh.connect(
+                        self.host,
+                        self.port,
+                        username=self.username,
+                        password=self.password,
+                        known_hosts=None,
+                        client_keys=None,
+                        agent_path=None,
+                        login_timeout=30,
+                        keepalive_interval=30,
+                    )
+                except (asyncssh.Error, OSError) as e:
+                    raise ProxyUnavailable(f"跳板机 {self.name} 不可用: {e}") from e
+            return {"host": dest_host, "port": dest_port, "tunnel": self._jump_conn}
+        sock = await open_socks5_socket(
+            self.host, self.port, dest_host, dest_port, timeout
+        )
+        return {"host": dest_host, "sock": sock}
+
+    def close_async(self):
+        if self._jump_conn is not None:
+            self._jump_conn.close()
+            self._jump_conn = None
+
+
+class ProxyPool:
+    def __init__(self, endpoints, log=None):
+        self.endpoints = endpoints
+        self.log = log or (lambda msg: None)
+
+    @classmethod
+    def load(cls, config_file, default_host, default_port, log=None):
+        """读取代理池配置；文件不存在或为空时只包含一个默认SOCKS5代理"""
+        endpoints = []
+        if os.path.exists(config_file):
+            parser = configparser.ConfigParser()
+            parser.read(config_file, encoding="utf-8")
+            for section in parser.sections():
+                cfg = parser[section]
+                endpoints.append(
+                    ProxyEndpoint(
+                        section,
+                        type=cfg.get("type", "socks5").strip().lower(),
+                        host=cfg.get("host", "localhost").strip(),
+                        port=cfg.getint("port", 1999),
+                        max_sessions=cfg.getint("max_sessions", 0),
+                        subnets=_split_list(cfg.get("subnets", "")),
+                        regions=_split_list(cfg.get("regions", "")),
+                        username=cfg.get("username", ""),
+                        password=cfg.get("password", ""),
+                    )
+                )
+        if not endpoints:
+            endpoints.append(
+                ProxyEndpoint("default", host=default_host, port=default_port)
+            )
+        return cls(endpoints, log)
+
+    def candidates(self, dev):
+        """按 代理列 > 区域列 > 网段(最长前缀优先) > 默认代理 的顺序给出候选端点"""
+        named = str(dev.get("代理") or "").strip()
+        region = str(dev.get("区域") or "").strip()
+        ordered = []
+        if named:
+            ordered += [ep for ep in self.endpoints if ep.name == named]
+        if region:
+            ordered += [ep for ep in self.endpoints if region in ep.regions]
+        try:
+            ip = ipaddress.ip_address(str(dev.get("管理IP", "")).strip())
+            matched = [
+                (net.prefixlen, ep)
+                for ep in self.endpoints
+                for net in ep.subnets
+                if ip.version == net.version and ip in net
+            ]
+            ordered += [ep for _, ep in sorted(matched, key=lambda m: -m[0])]
+        except ValueError:
+            pass
+        ordered += [ep for ep in self.endpoints if ep.is_default]
+        if not ordered:
+            ordered = list(self.endpoints)
+
+        seen, result = set(), []
+        for ep in ordered:
+            if id(ep) not in seen:
+                seen.add(id(ep))
+                result.append(ep)
+        return [ep for ep in result if ep.is_alive()] + [
+            ep for ep in result if not ep.is_alive()
+        ]
+
+    def check_all(self):
+        for ep in self.endpoints:
+            if ep.check():
+                ep.mark_alive()
+                self.log(f"代理 {ep} 可用，并发上限: {ep.max_sessions or '不限'}")
+            else:
+                ep.mark_dead()
+                self.log(f"代理 {ep} 健康检查失败，暂不使用")
+
+    def connect(self, dev, port, timeout):
+        """按候选顺序建立连接，代理不可用时切换下一个；返回(端点, socket)，用完须调用端点的release()"""
+        last_error = None
+        for ep in self.candidates(dev):
+            ep.acquire()
+            try:
+                return ep, ep.open(dev["管理IP"], port, timeout)
+            except ProxyUnavailable as e:
+                ep.release()
+                ep.mark_dead()
+                self.log(f"  代理 {ep} 不可用，切换下一个: {e}")
+                last_error = e
+            except BaseException:
+                ep.release()
+                raise
+        raise last_error or ProxyUnavailable("没有可用的代理")
+
+    def reset_async(self):
+        for ep in self.endpoints:
+            ep.reset_async()
+
+    def close_async(self):
+        for ep in self.endpoints:
+            ep.close_async()
+
+    async def connect_async(self, dev, port, timeout, mark_dead=True):
+        """mark_dead为False时代理不可用只切换下一个，不把端点标记为失效(预检的短超时探测不足以判断代理状态)"""
+        last_error = None
+        for ep in self.candidates(dev):
+            await ep.acquire_async()
+            try:
+                return ep, await ep.open_async(dev["管理IP"], port, timeout)
+            except ProxyUnavailable as e:
+                ep.release_async()
+                last_error = e
+                if mark_dead:
+                    ep.mark_dead()
+                    self.log(f"  代理 {ep} 不可用，切换下一个: {e}")
+            except BaseException:
+                ep.release_async()
+                raise
+        raise last_error or ProxyUnavailable("没有可用的代理")
+
+
+def _split_list(value):
+    return [v.strip() for v in value.replace("，", ",").split(",") if v.strip()]
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+异步采集引擎 - 基于asyncio的单事件循环SSH采集，支持数千会话并发
+"""
+
+import asyncio
+import time
+
+import asyncssh
+
+from modules.concurrency import AsyncAdaptiveGate
+from modules.ssh_session import (
+    DEFAULT_PROMPT_PATTERNS,
+    OutputCapture,
+    PipelineTracker,
+    PromptError,
+    PromptMatcher,
+    split_pipelined_output,
+)
+
+
+def loop_time():
+    return asyncio.get_running_loop().time()
+
+
+class TimingClient(asyncssh.SSHClient):
+    """记录TCP建立、密钥交换完成(开始认证)与认证完成的时刻"""
+
+    def __init__(self):
+        self.marks = {}
+
+    def connection_made(self, conn):
+        self.marks["connect"] = time.perf_counter()
+
+    def begin_auth(self, username):
+        self.marks["handshake"] = time.perf_counter()
+        return True
+
+    def auth_completed(self):
+        self.marks["auth"] = time.perf_counter()
+
+
+class AsyncCollectEngine:
+    def __init__(self, collector):
+        self.collector = collector
+
+    def run(self, devices, concurrent_limit):
+        asyncio.run(self._run_all(devices, concurrent_limit))
+
+    async def _run_all(self, devices, concurrent_limit):
+        if self.collector.controller is not None:
+            gate = AsyncAdaptiveGate(self.collector.controller)
+        else:
+            gate = asyncio.Semaphore(concurrent_limit)
+        self.collector.proxy_pool.reset_async()
+
+        async def bounded(dev):
+            async with gate:
+                await self.collect_single_device(dev)
+
+        try:
+            await asyncio.gather(*(bounded(dev) for dev in devices))
+        finally:
+            self.collector.proxy_pool.close_async()
+
+    async def collect_single_device(self, dev):
+        c = self.collector
+        name, ip, vendor = dev["设备名称"], dev["管理IP"], dev["厂商"].strip()
+        c.log(f"准备连接: {name} ({ip})")
+
+        timing = c.report.device(name, ip, vendor)
+        client = TimingClient()
+        conn = endpoint = None
+        try:
+            start_time = loop_time()
+            try:
+                endpoint, target = await c.proxy_pool.connect_async(dev, 22, 30)
+                timing.proxy = endpoint.name
+                conn = await asyncssh.connect(
+                    **target,
+                    username=dev["用户名"],
+                    password=dev["密码"],
+                    known_hosts=None,
+                    client_keys=None,
+                    agent_path=None,
+                    login_timeout=30,
+                    client_factory=lambda: client,
+                )
+            except Exception as e:
+                c.report_connect_failure(e, name)
+                raise
+            finally:
+                for phase in ("connect", "handshake", "auth"):
+                    if phase in client.marks:
+                        timing.mark(phase, client.marks[phase])
+            c.report_connected(loop_time() - start_time, name)
+
+            process = await conn.create_process(
+                term_type="vt100", term_size=(200, 1000), encoding=None
+            )
+            stdin, stdout = process.stdin, process.stdout
+
+            matcher = await self.open_prompt_matcher(stdin, stdout, name, vendor)
+
+            if vendor in c.PAGING_DISABLE_CMDS:
+                stdin.write(c.PAGING_DISABLE_CMDS[vendor].encode())
+                await self.read_command_output(stdout, matcher, timeout=10)
+            timing.mark("shell")
+
+            commands = c.commands.get(vendor, [])
+            sections = await self.run_commands(
+                stdin, stdout, matcher, name, commands, timing
+            )
+            await self.persist(c.save_output, name, vendor, commands, sections)
+            await self.persist(c.record_result, dev, True)
+            timing.finish(True)
+            return True
+        except Exception as e:
+            await self.persist(c.record_result, dev, False, e)
+            timing.finish(False, e)
+            return False
+        finally:
+            if conn is not None:
+                conn.close()
+            if endpoint is not None:
+                endpoint.release_async()
+
+    async def persist(self, func, *args):
+        """写采集文件、压缩存入采集历史与采集日志fsync都是阻塞操作，放到线程池执行，事件循环只处理网络I/O"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def run_commands(self, stdin, stdout, matcher, name, commands, timing):
+        c = self.collector
+        if c.pipeline and matcher.prompt and len(commands) > 1:
+            start_time = time.perf_counter()
+            stdin.write(("\n".join(commands) + "\n").encode())
+            tracker = PipelineTracker(matcher.prompt, commands)
+            capture = await self.read_until(
+                stdout,
+                lambda tail: tracker.complete and matcher.at_prompt(tail),
+                c.COMMAND_TIMEOUT * len(commands),
+                c.PROMPT_IDLE_TIMEOUT,
+                listener=tracker.feed,
+            )
+            sections = split_pipelined_output(
+                capture.getvalue(), matcher.prompt, commands
+            )
+            if sections is not None:
+                c.record_pipelined(timing, commands, sections, tracker, start_time)
+                return sections
+            c.log(f"  {name} 流水线回显无法按命令切分，改为逐条执行")
+            await self.read_until(stdout, matcher.at_prompt, 10, c.LOGIN_IDLE_TIMEOUT)
+
+        sections = []
+        for cmd in commands:
+            start_time = time.perf_counter()
+            stdin.write((cmd + "\n").encode())
+            capture = await self.read_command_output(stdout, matcher)
+            timing.command(cmd, time.perf_counter() - start_time, capture.size)
+            c.check_prompt(matcher, capture, cmd)
+            sections.append(capture.getvalue())
+        return sections
+
+    async def open_prompt_matcher(self, stdin, stdout, name, vendor):
+        c = self.collector
+        patterns = c.prompt_patterns.get(vendor) or DEFAULT_PROMPT_PATTERNS.get(vendor)
+        matcher = PromptMatcher(patterns)
+        capture = await self.read_until(
+            stdout,
+            matcher.learn,
+            c.LOGIN_PROMPT_TIMEOUT,
+            c.LOGIN_IDLE_TIMEOUT,
+            wait_empty=False,
+        )
+        received = capture.size
+        if not matcher.prompt:
+            stdin.write(b"\n")
+            capture = await self.read_until(
+                stdout,
+                matcher.learn,
+                c.LOGIN_PROMPT_TIMEOUT,
+                c.LOGIN_IDLE_TIMEOUT,
+                wait_empty=False,
+            )
+            received += capture.size
+        if not received:
+            raise PromptError("登录后未收到任何回显")
+        if not matcher.prompt:
+            c.log(f"  {name} 未识别到提示符，改用通用提示符匹配")
+        return matcher
+
+    async def read_command_output(self, stdout, matcher, timeout=None):
+        c = self.collector
+        timeout = timeout or c.COMMAND_TIMEOUT
+        if matcher.prompt:
+            return await self.read_until(
+                stdout, matcher.at_prompt, timeout, c.PROMPT_IDLE_TIMEOUT
+            )
+        return await self.read_until(
+            stdout,
+            matcher.at_prompt,
+            timeout,
+            c.FALLBACK_IDLE_TIMEOUT,
+            settle=c.FALLBACK_SETTLE_TIME,
+        )
+
+    async def read_until(
+        self, stdout, done, timeout, idle, settle=0, wait_empty=True, listener=None
+    ):
+        loop = asyncio.get_running_loop()
+        capture, settling = OutputCapture(listener=listener), False
+        start_time = last_recv = loop.time()
+        while True:
+            now = loop.time()
+            if settling:
+                limit = last_recv + settle
+            else:
+                limit = start_time + timeout
+                if capture.size or not wait_empty:
+                    limit = min(limit, last_recv + idle)
+            if now >= limit:
+                break
+            try:
+                chunk = await asyncio.wait_for(stdout.read(65535), limit - now)
+            except asyncio.TimeoutError:
+                continue
+            if not chunk:
+                break
+            capture.feed(chunk)
+            last_recv = loop.time()
+            if done(capture.tail):
+                if not settle:
+                    break
+                settling = True
+            else:
+                settling = False
+        return capture
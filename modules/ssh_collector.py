@@ -3,162 +3,17 @@
 SSH采集模块 - 批量采集设备LLDP信息
 """
 
-import pandas as pd
-import paramiko
-import socks
 import os
-import time
-import re
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
-from datetime import datetime
 import threading
-from concurrent.futures import ThreadPoolExecutor
 import ttkbootstrap as ttk
 
+from modules.lldp_parser_core import LLDPTextParser
+from modules.log_view import BatchedLogView
+from modules.ssh_collector_core import LLDPSSHCollector
 
-class LLDPSSHCollector:
-    def __init__(self, base_dir, log_callback):
-        self.base_dir = base_dir
-        self.output_dir = os.path.join(base_dir, "lldp_data")
-        self.config_dir = os.path.join(base_dir, "config")
-        self.log_callback = log_callback
-        for d in [self.output_dir, self.config_dir]:
-            if not os.path.exists(d):
-                os.makedirs(d)
-        self.commands = {}
-        self.socks_host, self.socks_port = "localhost", 1999
-        self.max_workers = 50
-        self.load_commands()
-        self.stats = {"success": 0, "failed": 0}
-        self._lock = threading.Lock()
-
-    def load_commands(self):
-        cmd_file = os.path.join(self.config_dir, "lldp_commands.txt")
-        if not os.path.exists(cmd_file):
-            return
-        try:
-            with open(cmd_file, "r", encoding="utf-8") as f:
-                v = None
-                for line in f:
-                    line = line.strip()
-                    if not line or line.startswith("#"):
-                        continue
-                    if line.startswith("[") and line.endswith("]"):
-                        v = line[1:-1]
-                        self.commands[v] = []
-                    elif v:
-                        self.commands[v].append(line)
-        except Exception as e:
-            self.log(f"加载命令文件失败: {e}")
-
-    def log(self, message):
-        self.log_callback(f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
-
-    def collect_single_device(self, dev):
-        name, ip, vendor = dev["设备名称"], dev["管理IP"], dev["厂商"].strip()
-        self.log(f"准备连接: {name} ({ip})")
-
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        try:
-            sock = socks.socksocket()
-            sock.set_proxy(socks.SOCKS5, self.socks_host, self.socks_port)
-            sock.connect((ip, 22))
-            ssh.connect(
-                hostname=ip,
-                username=dev["用户名"],
-                password=dev["密码"],
-                sock=sock,
-                timeout=30,
-                look_for_keys=False,
-                allow_agent=False,
-            )
-
-            shell = ssh.invoke_shell(width=200, height=1000)
-            shell.settimeout(1)
-
-            time.sleep(2)
-            if shell.recv_ready():
-                shell.recv(65535)
-
-            disable_cmds = {
-                "华为": "screen-length 0 temporary\n",
-                "华三": "screen-length disable\n",
-                "锐捷": "terminal length 0\n",
-            }
-            if vendor in disable_cmds:
-                shell.send(disable_cmds[vendor].encode())
-                time.sleep(1)
-                if shell.recv_ready():
-                    shell.recv(65535)
-
-            output_content = [f"<{name}>"]
-            for cmd in self.commands.get(vendor, []):
-                shell.send((cmd + "\n").encode())
-                buffer, start_time, last_recv = "", time.time(), time.time()
-                prompt_regex = re.compile(r"[>#\]]\s*$")
-
-                while True:
-                    if time.time() - start_time > 300:
-                        break
-                    if shell.recv_ready():
-                        chunk = shell.recv(65535).decode("utf-8", errors="ignore")
-                        if chunk:
-                            buffer += chunk
-                            last_recv = time.time()
-                    lines = buffer.strip().splitlines()
-                    if lines and prompt_regex.search(lines[-1]):
-                        time.sleep(0.5)
-                        if not shell.recv_ready():
-                            break
-                    if time.time() - last_recv > 5 and len(buffer) > 0:
-                        break
-                    time.sleep(0.2)
-
-                output_content.append(f"<{name}>{cmd}")
-                output_content.append(buffer)
-
-            with open(
-                os.path.join(self.output_dir, f"{name}.txt"), "w", encoding="utf-8"
-            ) as f:
-                f.write("\n".join(output_content))
-
-            with self._lock:
-                self.stats["success"] += 1
-            self.log(f"  {name} 采集成功。")
-            return True
-        except Exception as e:
-            with self._lock:
-                self.stats["failed"] += 1
-            self.log(f"  {name} 失败: {e}")
-            return False
-        finally:
-            ssh.close()
-
-    def collect_batch(self, excel_path, concurrent_limit):
-        self.stats = {"success": 0, "failed": 0}
-        try:
-            df = pd.read_excel(excel_path, sheet_name="设备清单", dtype=str)
-            devices = df[df["启用"].str.strip() == "是"].to_dict("records")
-        except Exception as e:
-            self.log(f"错误: 无法读取设备清单 - {e}")
-            return
-
-        if not devices:
-            self.log("警告: 设备清单中没有已启用的设备。")
-            return
-
-        self.log(
-            f"开始并发采集，并发上限: {concurrent_limit}, 总设备数: {len(devices)}"
-        )
-
-        with ThreadPoolExecutor(max_workers=concurrent_limit) as executor:
-            list(executor.map(self.collect_single_device, devices))
-
-        self.log(f"\n批量采集任务结束：")
-        self.log(f"成功: {self.stats['success']} 台")
-        self.log(f"失败: {self.stats['failed']} 台")
+COLLECT_ENGINES = {"线程池": "thread", "异步(asyncio)": "asyncio"}
 
 
 class SSHCollectorPanel:
@@ -167,8 +22,21 @@ class SSHCollectorPanel:
         self.base_dir = base_dir
         self.path_var = tk.StringVar()
         self.concurrent_var = tk.IntVar(value=50)
-        self.collector = LLDPSSHCollector(base_dir, self.append_log)
+        self.engine_var = tk.StringVar(value="线程池")
+        self.reuse_var = tk.BooleanVar(value=False)
+        self.pipeline_var = tk.BooleanVar(value=False)
+        self.max_age_var = tk.IntVar(value=0)
+        self.adaptive_var = tk.BooleanVar(value=False)
+        self.processes_var = tk.IntVar(value=1)
+        self.preflight_var = tk.BooleanVar(value=False)
+        self.resume_var = tk.BooleanVar(value=False)
+        self.attempts_var = tk.IntVar(value=1)
+        self.archive_var = tk.BooleanVar(value=True)
+        self.stream_var = tk.BooleanVar(value=False)
+        self.limit_var = tk.StringVar()
         self.create_widgets()
+        self.collector = LLDPSSHCollector(base_dir, self.log_view.write)
+        self.collector.limit_callback = self.update_limit
 
     def create_widgets(self):
         header_frame = ttk.Frame(self.parent_frame, bootstyle="dark")
@@ -189,9 +57,9 @@ class SSHCollectorPanel:
         info_text = """批量通过SSH连接网络设备，采集LLDP邻居信息。
 
 使用方法：
-1. 准备包含设备信息的Excel清单（设备名称、IP、用户名、密码）
+1. 准备包含设备信息的清单（Excel/CSV/YAML/SQLite，含设备名称、IP、用户名、密码）
 2. 选择设备清单文件
-3. 设置并发数量（推荐30-100）
+3. 选择采集引擎并设置并发数量（线程池推荐30-100，异步引擎可设置到数千）
 4. 点击"开始执行并发采集"
 
 配置文件：config/lldp_commands.txt"""
@@ -227,7 +95,7 @@ class SSHCollectorPanel:
         spinbox = ttk.Spinbox(
             config_row,
             from_=1,
-            to=200,
+            to=5000,
             textvariable=self.concurrent_var,
             width=15,
             font=("Microsoft YaHei UI", 10),
@@ -235,9 +103,123 @@ class SSHCollectorPanel:
         spinbox.pack(side=tk.LEFT, padx=(0, 10))
         ttk.Label(
             config_row,
-            text="(推荐: 30-100)",
+            text="(推荐: 线程池30-100, 异步500-2000)",
             foreground="gray",
             font=("Microsoft YaHei UI", 9),
+        ).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Label(config_row, text="采集引擎:", font=("Microsoft YaHei UI", 10)).pack(
+            side=tk.LEFT, padx=(0, 10)
+        )
+        ttk.Combobox(
+            config_row,
+            textvariable=self.engine_var,
+            values=list(COLLECT_ENGINES),
+            state="readonly",
+            width=14,
+            font=("Microsoft YaHei UI", 10),
+        ).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Label(config_row, text="进程数:", font=("Microsoft YaHei UI", 10)).pack(
+            side=tk.LEFT, padx=(0, 10)
+        )
+        ttk.Spinbox(
+            config_row,
+            from_=1,
+            to=os.cpu_count() or 1,
+            textvariable=self.processes_var,
+            width=6,
+            font=("Microsoft YaHei UI", 10),
+        ).pack(side=tk.LEFT)
+
+        option_row = ttk.Frame(input_frame)
+        option_row.pack(fill=tk.X, pady=5)
+        ttk.Checkbutton(
+            option_row,
+            text="复用SSH会话（多次采集同一批设备时免去重复登录）",
+            variable=self.reuse_var,
+            bootstyle="primary",
+        ).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Checkbutton(
+            option_row,
+            text="流水线发送命令（高延迟链路下一次发送全部命令）",
+            variable=self.pipeline_var,
+            bootstyle="primary",
+        ).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Checkbutton(
+            option_row,
+            text="采集前预检（并发探测TCP/22，剔除不可达设备）",
+            variable=self.preflight_var,
+            bootstyle="primary",
+        ).pack(side=tk.LEFT, padx=(0, 20))
+
+        adaptive_row = ttk.Frame(input_frame)
+        adaptive_row.pack(fill=tk.X, pady=5)
+        ttk.Checkbutton(
+            adaptive_row,
+            text="自适应并发（以并发上限为最大值，按登录耗时与超时/认证失败比例自动增减）",
+            variable=self.adaptive_var,
+            bootstyle="primary",
+        ).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Label(
+            adaptive_row,
+            textvariable=self.limit_var,
+            foreground="gray",
+            font=("Microsoft YaHei UI", 10),
+        ).pack(side=tk.LEFT)
+
+        fresh_row = ttk.Frame(input_frame)
+        fresh_row.pack(fill=tk.X, pady=5)
+        ttk.Label(fresh_row, text="跳过最近", font=("Microsoft YaHei UI", 10)).pack(
+            side=tk.LEFT, padx=(0, 10)
+        )
+        ttk.Spinbox(
+            fresh_row,
+            from_=0,
+            to=10080,
+            textvariable=self.max_age_var,
+            width=8,
+            font=("Microsoft YaHei UI", 10),
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(
+            fresh_row,
+            text="分钟内已采集的设备 (0表示全部重新采集)",
+            font=("Microsoft YaHei UI", 10),
+        ).pack(side=tk.LEFT, padx=(0, 20))
+
+        retry_row = ttk.Frame(input_frame)
+        retry_row.pack(fill=tk.X, pady=5)
+        ttk.Checkbutton(
+            retry_row,
+            text="断点续采（只采集上次中断前未成功的设备）",
+            variable=self.resume_var,
+            bootstyle="primary",
+        ).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Label(retry_row, text="每台最多尝试", font=("Microsoft YaHei UI", 10)).pack(
+            side=tk.LEFT, padx=(0, 10)
+        )
+        ttk.Spinbox(
+            retry_row,
+            from_=1,
+            to=10,
+            textvariable=self.attempts_var,
+            width=6,
+            font=("Microsoft YaHei UI", 10),
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(
+            retry_row,
+            text="次 (失败后按指数退避重试，认证失败不重试)",
+            font=("Microsoft YaHei UI", 10),
+        ).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Checkbutton(
+            retry_row,
+            text="保存采集历史（按内容去重压缩）",
+            variable=self.archive_var,
+            bootstyle="primary",
+        ).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Checkbutton(
+            retry_row,
+            text="边采集边解析（结束后直接生成布线表）",
+            variable=self.stream_var,
+            bootstyle="primary",
         ).pack(side=tk.LEFT)
 
         log_frame = ttk.Labelframe(main_frame, text=" 实时日志 ", padding=15)
@@ -251,6 +233,9 @@ class SSHCollectorPanel:
             insertbackground="white",
         )
         self.log_area.pack(fill=tk.BOTH, expand=True)
+        self.log_view = BatchedLogView(
+            self.log_area, os.path.join(self.base_dir, "logs", "ssh_collector.log")
+        )
 
         btn_frame = ttk.Frame(main_frame)
         btn_frame.pack(pady=15)
@@ -263,16 +248,16 @@ class SSHCollectorPanel:
         )
         self.run_btn.pack()
 
-    def append_log(self, text):
-        def update():
-            self.log_area.insert(tk.END, text)
-            self.log_area.see(tk.END)
-
-        self.parent_frame.after(0, update)
+    def update_limit(self, limit):
+        self.parent_frame.after(0, lambda: self.limit_var.set(f"当前并发: {limit}"))
 
     def select_file(self):
         f = filedialog.askopenfilename(
-            filetypes=[("Excel Files", "*.xlsx")], initialdir=self.base_dir
+            filetypes=[
+                ("设备清单", "*.xlsx *.csv *.yaml *.yml *.db *.sqlite *.sqlite3"),
+                ("Excel Files", "*.xlsx"),
+            ],
+            initialdir=self.base_dir,
         )
         if f:
             self.path_var.set(f)
@@ -282,18 +267,52 @@ class SSHCollectorPanel:
             messagebox.showwarning("提示", "请先选择设备清单文件！")
             return
         self.run_btn.config(state=tk.DISABLED, text="并发任务执行中...")
-        self.log_area.delete(1.0, tk.END)
+        self.log_view.clear()
+        self.limit_var.set("")
         threading.Thread(target=self.run_logic, daemon=True).start()
 
     def run_logic(self):
+        parser = stream = None
+        if self.stream_var.get():
+            parser = LLDPTextParser(
+                self.collector.output_dir,
+                os.path.join(self.base_dir, "output"),
+                log_callback=self.collector.log,
+                cache_dir=os.path.join(self.base_dir, "cache"),
+            )
+            stream = parser.stream(os.cpu_count() or 1)
+            self.collector.saved_callback = stream.submit
         try:
-            self.collector.collect_batch(self.path_var.get(), self.concurrent_var.get())
+            self.collector.collect_batch(
+                self.path_var.get(),
+                self.concurrent_var.get(),
+                engine=COLLECT_ENGINES.get(self.engine_var.get(), "thread"),
+                reuse_sessions=self.reuse_var.get(),
+                pipeline=self.pipeline_var.get(),
+                max_age=self.max_age_var.get() * 60,
+                adaptive=self.adaptive_var.get(),
+                processes=self.processes_var.get(),
+                preflight=self.preflight_var.get(),
+                resume=self.resume_var.get(),
+                max_attempts=self.attempts_var.get(),
+                archive=self.archive_var.get(),
+            )
+            if stream is not None:
+                stream.close()
+                if self.collector.stats["success"]:
+                    success, info = parser.parse_all(os.cpu_count() or 1)
+                    self.collector.log(
+                        f"布线表: {info}" if success else f"解析失败: {info}"
+                    )
         finally:
+            if stream is not None:
+                self.collector.saved_callback = None
+                stream.close()
             self.parent_frame.after(0, self.finish_task)
 
     def finish_task(self):
         self.run_btn.config(state=tk.NORMAL, text="开始执行并发采集")
         messagebox.showinfo(
             "完成",
-            f"并发采集结束！\n成功: {self.collector.stats['success']}\n失败: {self.collector.stats['failed']}",
+            f"并发采集结束！\n成功: {self.collector.stats['success']}\n失败: {self.collector.stats['failed']}\n复用: {self.collector.stats.get('skipped', 0)}",
         )
@@ -0,0 +1,764 @@
+# -*- coding: utf-8 -*-
+"""
+SSH采集核心 - 批量采集设备LLDP信息（不依赖GUI，可供命令行调用）
+"""
+
+import paramiko
+import os
+import time
+import json
+import hashlib
+import socket
+from datetime import datetime
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from modules.capture_store import CaptureStore, format_capture
+from modules.collect_journal import CollectJournal
+from modules.concurrency import AdaptiveGate, AIMDController
+from modules.duration_history import DurationHistory
+from modules.inventory import load_devices
+from modules.preflight import Preflight
+from modules.run_report import RunReport
+from modules.socks_pool import ProxyPool
+from modules.ssh_session import (
+    DEFAULT_PROMPT_PATTERNS,
+    ERROR_KINDS,
+    OutputCapture,
+    PromptMatcher,
+    PipelineTracker,
+    PromptError,
+    SSHSession,
+    SSHSessionManager,
+    classify_error,
+    split_pipelined_output,
+)
+
+
+class LLDPSSHCollector:
+    PAGING_DISABLE_CMDS = {
+        "华为": "screen-length 0 temporary\n",
+        "华三": "screen-length disable\n",
+        "锐捷": "terminal length 0\n",
+    }
+
+    COMMAND_TIMEOUT = 300
+    LOGIN_PROMPT_TIMEOUT = 10
+    LOGIN_IDLE_TIMEOUT = 2
+    PROMPT_IDLE_TIMEOUT = 30
+    FALLBACK_IDLE_TIMEOUT = 5
+    FALLBACK_SETTLE_TIME = 0.5
+    SESSION_PROBE_TIMEOUT = 5
+    PREFLIGHT_TIMEOUT = 5
+    RETRY_MAX_DELAY = 300
+
+    def __init__(self, base_dir, log_callback):
+        self.base_dir = base_dir
+        self.output_dir = os.path.join(base_dir, "lldp_data")
+        self.capture_index_file = os.path.join(self.output_dir, "_capture_index.json")
+        self.journal_file = os.path.join(self.output_dir, "_journal.jsonl")
+        self.config_dir = os.path.join(base_dir, "config")
+        self.cache_dir = os.path.join(base_dir, "cache")
+        self.log_callback = log_callback
+        for d in [self.output_dir, self.config_dir]:
+            if not os.path.exists(d):
+                os.makedirs(d)
+        self.commands = {}
+        self.prompt_patterns = {}
+        self.socks_host, self.socks_port = "localhost", 1999
+        self.max_workers = 50
+        self.load_commands()
+        self.proxy_pool = ProxyPool.load(
+            os.path.join(self.config_dir, "proxies.txt"),
+            self.socks_host,
+            self.socks_port,
+            self.log,
+        )
+        self.stats = {"success": 0, "failed": 0}
+        self.error_kinds = Counter()
+        self.report = RunReport()
+        self.report_dir = os.path.join(base_dir, "output")
+        self.capture_store = CaptureStore(os.path.join(base_dir, "captures"))
+        self.capture_run = None
+        self.history = DurationHistory(os.path.join(self.output_dir, "_durations.json"))
+        self.session_manager = None
+        self.pipeline = False
+        self.capture_index = self.load_capture_index()
+        self.controller = None
+        self.limit_callback = None
+        # 每台设备的采集文件写入后以文件路径调用，用于边采集边解析
+        self.saved_callback = None
+        self.journal = None
+        self.max_attempts = 1
+        self.retry_delay = 10
+        self.attempt = 1
+        self.retry_queue = []
+        self._lock = threading.Lock()
+
+    def load_commands(self):
+        cmd_file = os.path.join(self.config_dir, "lldp_commands.txt")
+        if not os.path.exists(cmd_file):
+            return
+        try:
+            with open(cmd_file, "r", encoding="utf-8") as f:
+                v = None
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    if line.startswith("[") and line.endswith("]"):
+                        v = line[1:-1]
+                        self.commands[v] = []
+                    elif v and line.startswith("@prompt "):
+                        self.prompt_patterns.setdefault(v, []).append(
+                            line[len("@prompt ") :].strip()
+                        )
+                    elif v:
+                        self.commands[v].append(line)
+        except Exception as e:
+            self.log(f"加载命令文件失败: {e}")
+
+    def log(self, message):
+        self.log_callback(f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
+
+    def collect_single_device(self, dev):
+        name, ip, vendor = dev["设备名称"], dev["管理IP"], dev["厂商"].strip()
+        self.log(f"准备连接: {name} ({ip})")
+
+        timing = self.report.device(name, ip, vendor)
+        session, reusable = None, False
+        try:
+            session = self.open_session(dev, timing)
+            shell, matcher = session.shell, session.matcher
+
+            commands = self.commands.get(vendor, [])
+            sections = self.run_commands(shell, matcher, name, commands, timing)
+            self.save_output(name, vendor, commands, sections)
+            self.record_result(dev, True)
+            timing.finish(True)
+            reusable = True
+            return True
+        except Exception as e:
+            self.record_result(dev, False, e)
+            timing.finish(False, e)
+            return False
+        finally:
+            if session is not None:
+                if reusable and self.session_manager is not None:
+                    self.session_manager.release(session)
+                else:
+                    session.close()
+
+    def open_session(self, dev, timing):
+        """建立(或复用)已进入命令行的会话；直接驱动Transport以便分别记录握手、认证与开shell的耗时"""
+        name, ip, vendor = dev["设备名称"], dev["管理IP"], dev["厂商"].strip()
+        key = (ip, dev["用户名"])
+        if self.session_manager is not None:
+            session = self.session_manager.acquire(key)
+            if session is not None:
+                if self.probe_session(session):
+                    self.log(f"  {name} 复用已有SSH会话")
+                    timing.reused = True
+                    timing.proxy = session.proxy.name if session.proxy else ""
+                    timing.mark("shell")
+                    return session
+                session.close()
+
+        start_time = time.time()
+        try:
+            endpoint, sock = self.proxy_pool.connect(dev, 22, 30)
+        except Exception as e:
+            self.report_connect_failure(e, name)
+            raise
+        timing.proxy = endpoint.name
+        timing.mark("connect")
+        transport = paramiko.Transport(sock)
+        transport.banner_timeout = 30
+        session = SSHSession(key, transport, endpoint)
+        try:
+            try:
+                transport.start_client(timeout=30)
+                timing.mark("handshake")
+                transport.auth_password(dev["用户名"], dev["密码"])
+                timing.mark("auth")
+            except Exception as e:
+                self.report_connect_failure(e, name)
+                raise
+            self.report_connected(time.time() - start_time, name)
+
+            shell = transport.open_session(timeout=30)
+            shell.get_pty(width=200, height=1000)
+            shell.invoke_shell()
+            matcher = self.open_prompt_matcher(shell, name, vendor)
+
+            if vendor in self.PAGING_DISABLE_CMDS:
+                shell.send(self.PAGING_DISABLE_CMDS[vendor].encode())
+                self.read_command_output(shell, matcher, timeout=10)
+            timing.mark("shell")
+        except BaseException:
+            session.close()
+            raise
+        session.shell, session.matcher = shell, matcher
+        return session
+
+    def probe_session(self, session):
+        """复用前确认会话仍在命令行提示符下：发送回车，短时间内应回显提示符"""
+        try:
+            if not session.is_alive():
+                return False
+            while session.shell.recv_ready():
+                session.shell.recv(65535)
+            session.shell.send(b"\n")
+            capture = self.read_until(
+                session.shell,
+                session.matcher.at_prompt,
+                self.SESSION_PROBE_TIMEOUT,
+                self.SESSION_PROBE_TIMEOUT,
+            )
+            return session.matcher.at_prompt(capture.tail)
+        except Exception:
+            return False
+
+    def run_commands(self, shell, matcher, name, commands, timing):
+        if self.pipeline and matcher.prompt and len(commands) > 1:
+            start_time = time.perf_counter()
+            shell.send(("\n".join(commands) + "\n").encode())
+            tracker = PipelineTracker(matcher.prompt, commands)
+            capture = self.read_until(
+                shell,
+                lambda tail: tracker.complete and matcher.at_prompt(tail),
+                self.COMMAND_TIMEOUT * len(commands),
+                self.PROMPT_IDLE_TIMEOUT,
+                listener=tracker.feed,
+            )
+            sections = split_pipelined_output(
+                capture.getvalue(), matcher.prompt, commands
+            )
+            if sections is not None:
+                self.record_pipelined(timing, commands, sections, tracker, start_time)
+                return sections
+            self.log(f"  {name} 流水线回显无法按命令切分，改为逐条执行")
+            self.read_until(shell, matcher.at_prompt, 10, self.LOGIN_IDLE_TIMEOUT)
+
+        sections = []
+        for cmd in commands:
+            start_time = time.perf_counter()
+            shell.send((cmd + "\n").encode())
+            capture = self.read_command_output(shell, matcher)
+            timing.command(cmd, time.perf_counter() - start_time, capture.size)
+            self.check_prompt(matcher, capture, cmd)
+            sections.append(capture.getvalue())
+        return sections
+
+    def record_pipelined(self, timing, commands, sections, tracker, start_time):
+        """流水线模式下以各命令回显标记出现的时刻切分耗时，字节数按切分后的文本估算"""
+        ends = tracker.found_at + [time.perf_counter()]
+        for cmd, section, end in zip(commands, sections, ends):
+            timing.command(cmd, end - start_time, len(section.encode("utf-8")))
+            start_time = end
+
+    def open_prompt_matcher(self, shell, name, vendor):
+        patterns = self.prompt_patterns.get(vendor) or DEFAULT_PROMPT_PATTERNS.get(
+            vendor
+        )
+        matcher = PromptMatcher(patterns)
+        received = self.read_until(
+            shell,
+            matcher.learn,
+            self.LOGIN_PROMPT_TIMEOUT,
+            self.LOGIN_IDLE_TIMEOUT,
+            wait_empty=False,
+        ).size
+        if not matcher.prompt:
+            shell.send(b"\n")
+            received += self.read_until(
+                shell,
+                matcher.learn,
+                self.LOGIN_PROMPT_TIMEOUT,
+                self.LOGIN_IDLE_TIMEOUT,
+                wait_empty=False,
+            ).size
+        if not received:
+            raise PromptError("登录后未收到任何回显")
+        if not matcher.prompt:
+            self.log(f"  {name} 未识别到提示符，改用通用提示符匹配")
+        return matcher
+
+    def read_command_output(self, shell, matcher, timeout=None):
+        timeout = timeout or self.COMMAND_TIMEOUT
+        if matcher.prompt:
+            return self.read_until(
+                shell, matcher.at_prompt, timeout, self.PROMPT_IDLE_TIMEOUT
+            )
+        return self.read_until(
+            shell,
+            matcher.at_prompt,
+            timeout,
+            self.FALLBACK_IDLE_TIMEOUT,
+            settle=self.FALLBACK_SETTLE_TIME,
+        )
+
+    def read_until(
+        self, shell, done, timeout, idle, settle=0, wait_empty=True, listener=None
+    ):
+        """阻塞读取直到done(回显尾部)成立；有数据后空闲idle秒或总时长超过timeout即返回"""
+        capture, settling = OutputCapture(listener=listener), False
+        start_time = last_recv = time.time()
+        while True:
+            now = time.time()
+            if settling:
+                limit = last_recv + settle
+            else:
+                limit = start_time + timeout
+                if capture.size or not wait_empty:
+                    limit = min(limit, last_recv + idle)
+            if now >= limit:
+                break
+            shell.settimeout(limit - now)
+            try:
+                chunk = shell.recv(65535)
+            except socket.timeout:
+                continue
+            if not chunk:
+                break
+            capture.feed(chunk)
+            last_recv = time.time()
+            if done(capture.tail):
+                if not settle:
+                    break
+                settling = True
+            else:
+                settling = False
+        return capture
+
+    def save_output(self, name, vendor, commands, sections):
+        path = os.path.join(self.output_dir, f"{name}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(format_capture(name, commands, sections))
+        if self.saved_callback is not None:
+            self.saved_callback(path)
+        if self.capture_run is not None:
+            self.capture_run.add(name, vendor, commands, sections)
+        with self._lock:
+            self.capture_index[name] = {
+                "time": time.time(),
+                "commands": self.commands_digest(vendor),
+            }
+
+    def commands_digest(self, vendor):
+        text = "\n".join(self.commands.get(vendor, []))
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+    def load_capture_index(self):
+        try:
+            with open(self.capture_index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_capture_index(self):
+        tmp_file = self.capture_index_file + ".tmp"
+        with self._lock:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self.capture_index, f, ensure_ascii=False)
+        os.replace(tmp_file, self.capture_index_file)
+
+    def split_fresh(self, devices, max_age):
+        """按采集索引拆分为(仍新鲜可复用的设备, 需要采集的设备)；命令集变化的设备视为过期"""
+        now, fresh, pending = time.time(), [], []
+        for dev in devices:
+            name, vendor = dev["设备名称"], dev["厂商"].strip()
+            entry = self.capture_index.get(name)
+            if (
+                entry
+                and now - entry["time"] <= max_age
+                and entry["commands"] == self.commands_digest(vendor)
+                and os.path.exists(os.path.join(self.output_dir, f"{name}.txt"))
+            ):
+                fresh.append(dev)
+            else:
+                pending.append(dev)
+        return fresh, pending
+
+    def split_done(self, devices, done):
+        """断点续采时排除采集日志中已成功且结果文件仍在的设备"""
+        return [
+            dev
+            for dev in devices
+            if dev["设备名称"] not in done
+            or not os.path.exists(
+                os.path.join(self.output_dir, f"{dev['设备名称']}.txt")
+            )
+        ]
+
+    def check_prompt(self, matcher, capture, cmd):
+        """已学到提示符时，命令回显须以提示符结束，否则设备卡住或断开，不再继续后续命令"""
+        if matcher.prompt and not matcher.at_prompt(capture.tail):
+            raise PromptError(f"命令 '{cmd}' 执行后未返回提示符")
+
+    def record_result(self, dev, success, error=None, retry=True):
+        """失败且尚有尝试次数时放入重试队列；只有最终结果计入统计并写入采集日志"""
+        name = dev["设备名称"]
+        kind = None if success else classify_error(error)
+        if retry and kind and kind != "auth" and self.attempt < self.max_attempts:
+            with self._lock:
+                self.retry_queue.append(dev)
+            self.log(f"  {name} 失败({ERROR_KINDS[kind]}): {error}，稍后重试")
+            return
+        with self._lock:
+            self.stats["success" if success else "failed"] += 1
+            if kind:
+                self.error_kinds[kind] += 1
+        if self.journal is not None:
+            self.journal.record(name, success, kind, self.attempt)
+        if success:
+            self.log(f"  {name} 采集成功。")
+        else:
+            self.log(f"  {name} 失败({ERROR_KINDS[kind]}): {error}")
+
+    def report_connected(self, latency, name=None):
+        if self.controller is not None:
+            self.controller.on_success(latency, name)
+
+    def report_connect_failure(self, error, name=None):
+        if self.controller is not None:
+            self.controller.on_failure(classify_error(error), name)
+
+    def on_limit_change(self, old, new, reason):
+        if (
+            new < old
+            or new >= self._logged_limit * 1.25
+            or new == self.controller.max_limit
+        ):
+            self._logged_limit = new
+            self.log(f"自适应并发: {old} -> {new} ({reason})")
+        if self.limit_callback is not None:
+            self.limit_callback(new)
+
+    def schedule_devices(self, devices, concurrent_limit):
+        """最长任务优先：按历史耗时从长到短排列，慢设备最先开始，避免其拖在批次末尾"""
+        devices, known, predicted = self.history.schedule(devices, concurrent_limit)
+        if not known:
+            return devices, None
+        self.log(
+            f"按历史耗时从长到短调度: {known}/{len(devices)} 台有历史记录，预计耗时 {predicted:.1f} 秒"
+        )
+        return devices, predicted
+
+    def save_capture_run(self, inventory_names):
+        run, self.capture_run = self.capture_run, None
+        if run is None or not run.devices:
+            return
+        try:
+            run_id = run.commit(keep=inventory_names)
+            self.log(
+                f"采集历史已保存: {run_id}，{len(run.devices)} 台设备 {run.sections} 段回显，其中新内容 {run.new_objects} 段"
+            )
+        except Exception as e:
+            self.log(f"保存采集历史失败: {e}")
+
+    def save_history(self):
+        try:
+            self.history.update(self.report.devices)
+            self.history.save()
+        except Exception as e:
+            self.log(f"保存采集耗时历史失败: {e}")
+
+    def write_report(self):
+        try:
+            paths = self.report.write(self.report_dir)
+            self.log(f"运行报告已保存: {', '.join(os.path.basename(p) for p in paths)}")
+        except Exception as e:
+            self.log(f"保存运行报告失败: {e}")
+
+    def enable_session_reuse(self, enabled=True):
+        if enabled and self.session_manager is None:
+            self.session_manager = SSHSessionManager()
+        elif not enabled and self.session_manager is not None:
+            self.session_manager.close_all()
+            self.session_manager = None
+
+    def collect_batch(
+        self,
+        inventory_path,
+        concurrent_limit,
+        engine="thread",
+        reuse_sessions=False,
+        pipeline=False,
+        max_age=0,
+        adaptive=False,
+        processes=1,
+        preflight=False,
+        preflight_timeout=None,
+        resume=False,
+        max_attempts=1,
+        retry_delay=10,
+        archive=True,
+    ):
+        self.stats = {"success": 0, "failed": 0, "skipped": 0}
+        self.error_kinds = Counter()
+        self.report = RunReport(engine)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        try:
+            devices = load_devices(inventory_path, self.cache_dir)
+        except Exception as e:
+            self.log(f"错误: 无法读取设备清单 - {e}")
+            return
+        inventory_names = [dev["设备名称"] for dev in devices]
+
+        if not devices:
+            self.log("警告: 设备清单中没有已启用的设备。")
+            return
+
+        journal = CollectJournal(self.journal_file)
+        if resume:
+            total, devices = len(devices), self.split_done(devices, journal.load_done())
+            self.stats["skipped"] = self.report.skipped = total - len(devices)
+            self.log(
+                f"断点续采: 跳过上次已成功的 {total - len(devices)} 台，剩余 {len(devices)} 台"
+            )
+            if not devices:
+                self.log("上次采集的设备均已成功，无需继续。")
+                return
+
+        if max_age > 0:
+            fresh, devices = self.split_fresh(devices, max_age)
+            self.stats["skipped"] += len(fresh)
+            self.report.skipped = self.stats["skipped"]
+            if fresh:
+                self.log(
+                    f"复用 {len(fresh)} 台 {max_age / 60:g} 分钟内已采集且命令集未变的设备结果"
+                )
+            if not devices:
+                self.log("所有设备均有新鲜的采集结果，无需重新采集。")
+                return
+
+        self.log(
+            f"开始并发采集，引擎: {engine}, 并发上限: {concurrent_limit}, 总设备数: {len(devices)}"
+        )
+
+        self.pipeline = pipeline
+        self.controller = None
+        self.journal = journal
+        journal.start(resume, inventory=os.path.abspath(inventory_path))
+        self.capture_run = self.capture_store.begin_run() if archive else None
+        predicted = None
+        try:
+            self.proxy_pool.check_all()
+            if preflight:
+                devices = self.run_preflight(
+                    devices, preflight_timeout or self.PREFLIGHT_TIMEOUT
+                )
+            devices, predicted = self.schedule_devices(devices, concurrent_limit)
+            started = time.perf_counter()
+            processes = max(1, min(processes, len(devices)))
+            if processes > 1:
+                if reuse_sessions:
+                    self.log("提示: 多进程模式下各进程独立登录，不复用SSH会话")
+                self.collect_sharded(
+                    devices, concurrent_limit, engine, adaptive, processes
+                )
+            elif devices:
+                self.enable_session_reuse(reuse_sessions)
+                if self.session_manager is not None:
+                    if engine == "asyncio":
+                        self.log("提示: 异步引擎每批使用独立事件循环，不复用SSH会话")
+                    else:
+                        self.log(
+                            f"已启用SSH会话复用，当前缓存会话: {len(self.session_manager)}"
+                        )
+                self.collect_devices(devices, concurrent_limit, engine, adaptive)
+        finally:
+            journal.close()
+            self.journal = None
+            self.save_capture_index()
+            self.save_capture_run(inventory_names)
+            self.save_history()
+            self.write_report()
+
+        self.log(f"\n批量采集任务结束：")
+        self.log(f"成功: {self.stats['success']} 台")
+        self.log(f"失败: {self.stats['failed']} 台")
+        if predicted is not None:
+            self.log(
+                f"预计耗时: {predicted:.1f} 秒，实际耗时: {time.perf_counter() - started:.1f} 秒"
+            )
+        if self.controller is not None:
+            self.log(f"结束时自适应并发: {self.controller.limit}")
+        if self.error_kinds:
+            self.log(
+                "失败分类: "
+                + ", ".join(
+                    f"{ERROR_KINDS[k]} {n}" for k, n in self.error_kinds.most_common()
+                )
+            )
+        if self.stats["skipped"]:
+            self.log(f"复用: {self.stats['skipped']} 台")
+
+    def run_preflight(self, devices, timeout):
+        """TCP/22预检，不可达或拒绝连接的设备直接计为失败，不再占用SSH并发名额；探测超时的设备照常采集"""
+        self.log(f"预检: 探测 {len(devices)} 台设备的SSH端口(超时 {timeout:g} 秒)...")
+        alive, dead = Preflight(self.proxy_pool, timeout=timeout).run(devices)
+        for dev, error in dead:
+            timing = self.report.device(dev["设备名称"], dev["管理IP"], dev["厂商"])
+            self.record_result(dev, False, error, retry=False)
+            timing.finish(False, error)
+        self.log(f"预检完成: 可达 {len(alive)} 台, 剔除 {len(dead)} 台")
+        return alive
+
+    def collect_devices(self, devices, concurrent_limit, engine, adaptive):
+        """在当前进程内并发采集给定设备"""
+        if adaptive:
+            self.controller = AIMDController(
+                concurrent_limit, on_change=self.on_limit_change
+            )
+            self._logged_limit = self.controller.limit
+            self.log(
+                f"已启用自适应并发，初始: {self.controller.limit}, 上限: {concurrent_limit}"
+            )
+            if self.limit_callback is not None:
+                self.limit_callback(self.controller.limit)
+
+        self.attempt = 1
+        while True:
+            self.retry_queue = []
+            self.run_pass(devices, concurrent_limit, engine)
+            if not self.retry_queue:
+                return
+            devices = self.retry_queue
+            delay = min(
+                self.RETRY_MAX_DELAY, self.retry_delay * 2 ** (self.attempt - 1)
+            )
+            self.attempt += 1
+            self.log(
+                f"{len(devices)} 台设备将在 {delay:g} 秒后重试（第 {self.attempt}/{self.max_attempts} 次尝试）"
+            )
+            time.sleep(delay)
+
+    def run_pass(self, devices, concurrent_limit, engine):
+        if engine == "asyncio":
+            from modules.ssh_async import AsyncCollectEngine
+
+            AsyncCollectEngine(self).run(devices, concurrent_limit)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrent_limit) as executor:
+                if self.controller is None:
+                    list(executor.map(self.collect_single_device, devices))
+                else:
+                    gate = AdaptiveGate(self.controller)
+
+                    def gated(dev):
+                        with gate:
+                            return self.collect_single_device(dev)
+
+                    list(executor.map(gated, devices))
+
+    def collect_sharded(self, devices, concurrent_limit, engine, adaptive, processes):
+        """把设备轮流分给多个子进程，各进程独立并发采集；日志与已保存的文件经队列回传，统计与采集索引在本进程合并"""
+        shard_limit = -(-concurrent_limit // processes)
+        shards = [devices[i::processes] for i in range(processes)]
+        self.log(f"多进程采集: {processes} 个进程，每进程并发上限 {shard_limit}")
+
+        manager = multiprocessing.Manager()
+        log_queue = manager.Queue()
+
+        def forward_logs():
+            while True:
+                text = log_queue.get()
+                if text is None:
+                    return
+                if isinstance(text, tuple):
+                    self.saved_callback(text[1])
+                else:
+                    self.log_callback(text)
+
+        forwarder = threading.Thread(target=forward_logs, daemon=True)
+        forwarder.start()
+        try:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                futures = [
+                    executor.submit(
+                        collect_shard,
+                        self.base_dir,
+                        shard,
+                        shard_limit,
+                        engine,
+                        self.pipeline,
+                        adaptive,
+                        processes,
+                        self.max_attempts,
+                        self.retry_delay,
+                        self.capture_run is not None,
+                        self.saved_callback is not None,
+                        log_queue,
+                    )
+                    for shard in shards
+                ]
+                for shard, future in zip(shards, futures):
+                    try:
+                        stats, error_kinds, timings, capture_index, captures = (
+                            future.result()
+                        )
+                    except Exception as e:
+                        self.log(f"采集进程异常退出，{len(shard)} 台设备计为失败: {e}")
+                        self.stats["failed"] += len(shard)
+                        self.error_kinds["other"] += len(shard)
+                        continue
+                    self.stats["success"] += stats["success"]
+                    self.stats["failed"] += stats["failed"]
+                    self.error_kinds.update(error_kinds)
+                    self.report.merge(timings)
+                    with self._lock:
+                        self.capture_index.update(capture_index)
+                    if captures is not None:
+                        self.capture_run.merge(captures)
+        finally:
+            log_queue.put(None)
+            forwarder.join()
+            manager.shutdown()
+
+
+def collect_shard(
+    base_dir,
+    devices,
+    concurrent_limit,
+    engine,
+    pipeline,
+    adaptive,
+    processes,
+    max_attempts,
+    retry_delay,
+    archive,
+    stream,
+    log_queue,
+):
+    """子进程入口：采集一个分片，返回(统计, 失败分类, 计时记录, 新增采集索引, 采集历史清单)"""
+    collector = LLDPSSHCollector(base_dir, log_queue.put)
+    for ep in collector.proxy_pool.endpoints:
+        if ep.max_sessions:
+            ep.max_sessions = max(1, ep.max_sessions // processes)
+    collector.capture_index = {}
+    collector.report = RunReport(engine)
+    collector.pipeline = pipeline
+    collector.max_attempts = max_attempts
+    collector.retry_delay = retry_delay
+    collector.journal = CollectJournal(collector.journal_file)
+    if archive:
+        collector.capture_run = collector.capture_store.begin_run()
+    if stream:
+        collector.saved_callback = lambda path: log_queue.put(("saved", path))
+    collector.journal.open()
+    try:
+        collector.collect_devices(devices, concurrent_limit, engine, adaptive)
+    finally:
+        collector.journal.close()
+    return (
+        collector.stats,
+        collector.error_kinds,
+        collector.report.devices,
+        collector.capture_index,
+        collector.capture_run.state() if archive else None,
+    )
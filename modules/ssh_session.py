@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+SSH会话辅助模块 - 设备提示符识别、命令回显的流式累积、流水线切分与会话复用
+"""
+
+import asyncio
+import codecs
+import errno
+import re
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+
+DEFAULT_PROMPT_PATTERNS = {
+    "华为": [r"<[^<>\s]+>", r"\[[^\[\]\s]+\]"],
+    "华三": [r"<[^<>\s]+>", r"\[[^\[\]\s]+\]"],
+    "锐捷": [r"[\w.\-/:]+(?:\([^()\s]*\))?[>#]"],
+}
+
+GENERIC_PROMPT_PATTERNS = [
+    r"<[^<>\s]+>",
+    r"\[[^\[\]\s]+\]",
+    r"[\w.\-/:]+(?:\([^()\s]*\))?[>#]",
+]
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+
+ERROR_KINDS = {
+    "unreachable": "不可达",
+    "refused": "拒绝连接",
+    "auth": "认证失败",
+    "timeout": "超时",
+    "prompt": "提示符异常",
+    "other": "其他",
+}
+
+SOCKS5_UNREACHABLE_CODES = (2, 3, 4, 6)
+SOCKS5_REFUSED_CODE = 5
+
+
+class PromptError(Exception):
+    """登录后没有任何回显，或命令执行后提示符未再出现"""
+
+
+def classify_error(exc):
+    """把连接/会话异常归类为 unreachable / refused / auth / timeout / prompt / other"""
+    name = type(exc).__name__
+    if name in (
+        "AuthenticationException",
+        "BadAuthenticationType",
+        "PermissionDenied",
+    ):
+        return "auth"
+    if isinstance(exc, PromptError):
+        return "prompt"
+    if name == "ProxyTargetError" and getattr(exc, "kind", None):
+        return exc.kind
+    code = getattr(exc, "code", None) if name == "ProxyTargetError" else None
+    if code == SOCKS5_REFUSED_CODE:
+        return "refused"
+    if code in SOCKS5_UNREACHABLE_CODES:
+        return "unreachable"
+    if isinstance(exc, ConnectionRefusedError):
+        return "refused"
+    if isinstance(exc, OSError) and exc.errno in (
+        errno.EHOSTUNREACH,
+        errno.ENETUNREACH,
+    ):
+        return "unreachable"
+    text = str(exc).lower()
+    if "refused" in text or "拒绝" in text:
+        return "refused"
+    if "unreachable" in text or "不可达" in text:
+        return "unreachable"
+    if (
+        isinstance(exc, (TimeoutError, socket.timeout, asyncio.TimeoutError))
+        or "timed out" in text
+        or "timeout" in text
+        or "protocol banner" in text
+    ):
+        return "timeout"
+    return "other"
+
+
+class PromptMatcher:
+    """从登录回显中学习设备提示符，之后只认该提示符作为命令结束标志"""
+
+    TAIL_SIZE = 512
+
+    def __init__(self, patterns=None):
+        self.patterns = [re.compile(p) for p in (patterns or GENERIC_PROMPT_PATTERNS)]
+        self.prompt = None
+
+    def last_line(self, text):
+        tail = ANSI_ESCAPE.sub("", text[-self.TAIL_SIZE :]).rstrip()
+        return tail.rsplit("\n", 1)[-1].strip()
+
+    def matches_pattern(self, line):
+        return any(p.fullmatch(line) for p in self.patterns)
+
+    def learn(self, text):
+        line = self.last_line(text)
+        if line and self.matches_pattern(line):
+            self.prompt = line
+            return True
+        return False
+
+    def at_prompt(self, text):
+        line = self.last_line(text)
+        if self.prompt:
+            return line == self.prompt
+        return bool(line) and self.matches_pattern(line)
+
+
+class OutputCapture:
+    """按块增量解码并保存文本，只维护定长尾部供提示符判断，整体开销与回显长度成线性；
+    默认UTF-8(无效字节忽略)，仅在尚未出现UTF-8多字节字符且回显能按GBK解码时改用GBK"""
+
+    TAIL_SIZE = 512
+    FALLBACK_ENCODING = "gbk"
+
+    def __init__(self, encoding="utf-8", listener=None):
+        self.listener = listener
+        self.parts = []
+        self.size = 0
+        self.encoding = encoding
+        self.tail = ""
+        self._decoder = None
+        self._carry = b""
+
+    def feed(self, data):
+        self.size += len(data)
+        if self._decoder is None:
+            text = self._detect(data)
+        else:
+            text = self._decoder.decode(data)
+        self.parts.append(text)
+        self.tail = (self.tail + text)[-self.TAIL_SIZE :]
+        if self.listener is not None:
+            self.listener(text)
+
+    def _detect(self, data):
+        """编码未确定前到目前为止的回显都是ASCII，确定编码时只需解码尚未解码的字节"""
+        buf, self._carry = self._carry + data, b""
+        try:
+            text = buf.decode(self.encoding)
+        except UnicodeDecodeError as e:
+            if e.end < len(buf) or e.reason != "unexpected end of data":
+                return self._settle(buf, self._fallback(buf))
+            # 末尾是被截断的多字节字符，留到下一块
+            text, self._carry = buf[: e.start].decode(self.encoding), buf[e.start :]
+        if not text.isascii():
+            return text + self._settle(self._carry, self.encoding)
+        return text
+
+    def _fallback(self, buf):
+        try:
+            codecs.getincrementaldecoder(self.FALLBACK_ENCODING)().decode(buf)
+        except UnicodeDecodeError:
+            return self.encoding
+        return self.FALLBACK_ENCODING
+
+    def _settle(self, buf, encoding):
+        self.encoding, self._carry = encoding, b""
+        self._decoder = codecs.getincrementaldecoder(encoding)("ignore")
+        return self._decoder.decode(buf)
+
+    def getvalue(self):
+        return "".join(self.parts)
+
+
+class PipelineTracker:
+    """流水线模式下跟踪回显进度：以"提示符+命令回显"作为每条命令开始的标记，跨块增量查找"""
+
+    def __init__(self, prompt, commands):
+        self.markers = [prompt + cmd for cmd in commands[1:]]
+        self.found = 0
+        self.found_at = []
+        self._keep = max((len(m) for m in self.markers), default=0)
+        self._carry = ""
+
+    @property
+    def complete(self):
+        return self.found == len(self.markers)
+
+    def feed(self, text):
+        buf, pos = self._carry + text, 0
+        while not self.complete:
+            i = buf.find(self.markers[self.found], pos)
+            if i < 0:
+                break
+            pos = i + len(self.markers[self.found])
+            self.found += 1
+            self.found_at.append(time.perf_counter())
+        self._carry = buf[max(pos, len(buf) - self._keep) :]
+
+
+def split_pipelined_output(text, prompt, commands):
+    """把一次性发送多条命令得到的回显切回每条命令，格式与逐条执行时一致；标记缺失时返回None"""
+    sections, start = [], 0
+    for cmd in commands[1:]:
+        i = text.find(prompt + cmd, start)
+        if i < 0:
+            return None
+        sections.append(text[start : i + len(prompt)])
+        start = i + len(prompt)
+    sections.append(text[start:])
+    return sections
+
+
+class SSHSession:
+    """一条已认证、已进入命令行的SSH会话"""
+
+    def __init__(self, key, transport, endpoint=None):
+        self.key = key
+        self.transport = transport
+        # proxy为会话所经的代理端点，endpoint为当前占用的该端点并发名额，空闲时为None
+        self.proxy = endpoint
+        self.endpoint = endpoint
+        self.shell = None
+        self.matcher = None
+        self.last_used = time.time()
+
+    def is_alive(self):
+        return (
+            self.transport.is_active()
+            and self.shell is not None
+            and not self.shell.closed
+        )
+
+    def acquire_endpoint(self):
+        """复用前重新占用所经代理的并发名额，代理已满时与新建连接一样等待"""
+        if self.proxy is not None and self.endpoint is None:
+            self.proxy.acquire()
+            self.endpoint = self.proxy
+
+    def release_endpoint(self):
+        if self.endpoint is not None:
+            self.endpoint.release()
+            self.endpoint = None
+
+    def close(self):
+        try:
+            self.transport.close()
+        finally:
+            self.release_endpoint()
+
+
+class SSHSessionManager:
+    """同一进程内缓存空闲SSH会话，按空闲超时与数量上限淘汰，供后续批次复用"""
+
+    REAP_INTERVAL = 30
+
+    def __init__(self, max_sessions=500, idle_timeout=300):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def __len__(self):
+        return len(self._idle)
+
+    def acquire(self, key):
+        """取出该键的空闲会话并重新占用其代理并发名额；不存在或已断开时返回None"""
+        with self._lock:
+            session = self._idle.pop(key, None)
+        if session is None:
+            return None
+        if not session.is_alive():
+            session.close()
+            return None
+        session.acquire_endpoint()
+        return session
+
+    def release(self, session):
+        """会话用完后放回缓存，代理并发名额随即释放"""
+        session.release_endpoint()
+        session.last_used = time.time()
+        with self._lock:
+            stale = self._idle.pop(session.key, None)
+            self._idle[session.key] = session
+            evicted = [stale] if stale is not None else []
+            while len(self._idle) > self.max_sessions:
+                evicted.append(self._idle.popitem(last=False)[1])
+            self._start_reaper()
+        for s in evicted:
+            s.close()
+
+    def evict_idle(self):
+        deadline = time.time() - self.idle_timeout
+        with self._lock:
+            expired = [k for k, s in self._idle.items() if s.last_used < deadline]
+            evicted = [self._idle.pop(k) for k in expired]
+        for s in evicted:
+            s.close()
+        return len(evicted)
+
+    def close_all(self):
+        with self._lock:
+            evicted = list(self._idle.values())
+            self._idle.clear()
+        for s in evicted:
+            s.close()
+
+    def _start_reaper(self):
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+
+        def reap():
+            while True:
+                time.sleep(self.REAP_INTERVAL)
+                self.evict_idle()
+                with self._lock:
+                    if not self._idle:
+                        self._reaper = None
+                        return
+
+        self._reaper = threading.Thread(target=reap, daemon=True)
+        self._reaper.start()
@@ -3,123 +3,12 @@
 PDF拓扑模块 - 生成PDF网络拓扑图
 """
 
-import pandas as pd
 import os
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from graphviz import Digraph
-from datetime import datetime
 import ttkbootstrap as ttk
 
-
-class TopoGrapher:
-    def __init__(self, excel_path, output_dir):
-        self.excel_path = excel_path
-        self.output_dir = os.path.join(output_dir, "graphs")
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-
-    def generate(self):
-        try:
-            df = pd.read_excel(self.excel_path)
-
-            dot = Digraph(comment="Network Topology", engine="dot")
-            dot.encoding = "utf-8"
-
-            dot.attr(rankdir="TB", splines="polyline", nodesep="1.0", ranksep="1.5")
-            dot.attr(
-                "node",
-                shape="box",
-                style="filled",
-                fillcolor="lightblue",
-                fontname="Microsoft YaHei",
-                fixedsize="false",
-                width="2.0",
-            )
-            dot.attr("edge", fontsize="9", fontname="Arial")
-
-            all_devices = set()
-            for _, row in df.iterrows():
-                all_devices.add(str(row["本端设备"]))
-                all_devices.add(str(row["对端设备"]))
-
-            layers = {"WER": [], "WBS": [], "WDS": [], "WAS": [], "OTHER": []}
-
-            for dev in all_devices:
-                dev_upper = dev.upper()
-                if "WER" in dev_upper:
-                    layers["WER"].append(dev)
-                elif "WBS" in dev_upper:
-                    layers["WBS"].append(dev)
-                elif "WDS" in dev_upper:
-                    layers["WDS"].append(dev)
-                elif "WAS" in dev_upper:
-                    layers["WAS"].append(dev)
-                else:
-                    layers["OTHER"].append(dev)
-
-            for layer_name in ["WER", "WBS", "WDS", "WAS", "OTHER"]:
-                devices = layers[layer_name]
-                if not devices:
-                    continue
-                with dot.subgraph() as s:
-                    s.attr(rank="same")
-                    for dev in devices:
-                        color = "lightgray"
-                        if layer_name == "WER":
-                            color = "#ff9999"
-                        elif layer_name == "WDS":
-                            color = "#99ff99"
-                        elif layer_name == "WBS":
-                            color = "#ffff99"
-                        elif layer_name == "WAS":
-                            color = "#99ccff"
-                        s.node(dev, fillcolor=color)
-
-            for _, row in df.iterrows():
-                l_dev = str(row["本端设备"])
-                r_dev = str(row["对端设备"])
-
-                l_phys = str(row.get("本端物理接口", row.get("本端接口", "")))
-                r_phys = str(row.get("对端物理接口", row.get("对端接口", "")))
-                l_logi = str(row.get("本端逻辑接口", ""))
-                r_logi = str(row.get("对端逻辑接口", ""))
-
-                def format_label(phys, logi):
-                    phys = str(phys) if str(phys) != "nan" else ""
-                    logi = str(logi) if str(logi) != "nan" else ""
-                    if logi and logi != phys:
-                        return f"{phys}\n({logi})"
-                    return phys
-
-                l_label = format_label(l_phys, l_logi)
-                r_label = format_label(r_phys, r_logi)
-
-                edge_label = f"{l_label}  <->  {r_label}"
-                dot.edge(l_dev, r_dev, label=edge_label)
-
-            timestamp = datetime.now().strftime("%m%d_%H%M")
-            output_filename = f"topo_{timestamp}"
-            output_path = os.path.join(self.output_dir, output_filename)
-
-            try:
-                dot.render(output_path, format="pdf", cleanup=True)
-            except Exception as e:
-                try:
-                    if hasattr(e, "stderr") and e.stderr:
-                        msg = e.stderr.decode("gbk")
-                        return f"GRAPHVIZ_ERROR: {msg}"
-                except:
-                    pass
-                raise e
-
-            return f"{output_path}.pdf"
-
-        except Exception as e:
-            err_msg = str(e)
-            if "codec" in err_msg:
-                return "ENCODING_ERROR"
-            raise e
+from modules.topo_pdf_core import TopoGrapher
 
 
 class TopoPDFPanel:
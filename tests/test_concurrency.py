@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+自适应并发 - 个别设备失败不回退，拥塞失败集中出现时回退
+"""
+
+import os
+import sys
+import unittest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from modules.concurrency import AIMDController
+
+
+class AIMDControllerTest(unittest.TestCase):
+    def controller(self):
+        c = AIMDController(100, initial=40, cooldown=0)
+        c.slow_start = False
+        return c
+
+    def test_isolated_failures_keep_limit(self):
+        c = self.controller()
+        for i in range(500):
+            if i % 10 == 0:
+                c.on_failure("timeout", f"DEAD-{i}")
+            else:
+                c.on_success(1.0, f"SW{i}")
+        self.assertGreaterEqual(c.limit, 40)
+
+    def test_wrong_password_is_not_congestion(self):
+        c = self.controller()
+        for i in range(200):
+            c.on_failure("auth", f"BADPW-{i}")
+        self.assertEqual(c.limit, 40)
+
+    def test_timeout_burst_backs_off(self):
+        c = self.controller()
+        for i in range(20):
+            c.on_success(1.0, f"SW{i}")
+        limit = c.limit
+        for i in range(20):
+            c.on_failure("timeout", f"SW{i}")
+        self.assertLessEqual(c.limit, limit // 2)
+
+    def test_auth_burst_on_known_devices_backs_off(self):
+        c = self.controller()
+        for i in range(20):
+            c.on_success(1.0, f"SW{i}")
+        limit = c.limit
+        for i in range(20):
+            c.on_failure("auth", f"SW{i}")
+        self.assertLess(c.limit, limit)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+回显累积 - UTF-8/GBK编码判断与跨块截断的多字节字符
+"""
+
+import os
+import sys
+import unittest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from modules.ssh_session import OutputCapture
+
+
+def capture(data, size):
+    c = OutputCapture()
+    for i in range(0, len(data), size):
+        c.feed(data[i : i + size])
+    return c
+
+
+class OutputCaptureTest(unittest.TestCase):
+    TEXT = "Interface  Description\nGE0/0/1    接口描述-核心交换机\n<SW1>"
+
+    def test_utf8_with_stray_byte(self):
+        data = self.TEXT.encode("utf-8") + b"\xff\n<SW1>"
+        for size in (1, 2, 3, 7, len(data)):
+            with self.subTest(size=size):
+                c = capture(data, size)
+                self.assertEqual(c.getvalue(), self.TEXT + "\n<SW1>")
+                self.assertEqual(c.encoding, "utf-8")
+                self.assertEqual(c.size, len(data))
+
+    def test_stray_byte_before_utf8(self):
+        data = b"banner \xff\n" + self.TEXT.encode("utf-8")
+        self.assertEqual(capture(data, 5).getvalue(), "banner \n" + self.TEXT)
+
+    def test_gbk_output(self):
+        data = self.TEXT.encode("gbk")
+        for size in (1, 4, len(data)):
+            with self.subTest(size=size):
+                c = capture(data, size)
+                self.assertEqual(c.getvalue(), self.TEXT)
+                self.assertEqual(c.encoding, "gbk")
+                self.assertTrue(c.tail.endswith("<SW1>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
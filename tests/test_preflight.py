@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+采集预检 - 探测在代理处超时或失败时设备仍视为可达，且不把代理标记为失效
+"""
+
+import os
+import socket
+import sys
+import threading
+import unittest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from modules.preflight import Preflight
+from modules.socks_pool import ProxyEndpoint, ProxyPool, ProxyUnavailable
+
+DEVICES = [{"设备名称": "SW1", "管理IP": "10.0.0.1"}]
+
+
+class SilentProxy:
+    """接受连接后不再应答的SOCKS5代理"""
+
+    def __init__(self):
+        self.server = socket.socket()
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(16)
+        self.port = self.server.getsockname()[1]
+        self.conns = []
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.conns.append(conn)
+
+    def close(self):
+        self.server.close()
+        for conn in self.conns:
+            conn.close()
+
+
+class PreflightProxyTest(unittest.TestCase):
+    def test_proxy_timeout_keeps_endpoint_alive(self):
+        proxy = SilentProxy()
+        try:
+            endpoint = ProxyEndpoint("slow", host="127.0.0.1", port=proxy.port)
+            alive, dead = Preflight(ProxyPool([endpoint]), timeout=0.3).run(DEVICES)
+        finally:
+            proxy.close()
+        self.assertEqual((len(alive), dead), (1, []))
+        self.assertTrue(endpoint.is_alive())
+
+    def test_proxy_unavailable_keeps_endpoint_alive(self):
+        endpoint = ProxyEndpoint("slow", host="127.0.0.1", port=1)
+
+        async def open_async(dest_host, dest_port, timeout):
+            raise ProxyUnavailable("无法连接代理: TimeoutError()")
+
+        endpoint.open_async = open_async
+        alive, dead = Preflight(ProxyPool([endpoint]), timeout=0.3).run(DEVICES)
+        self.assertEqual((len(alive), dead), (1, []))
+        self.assertTrue(endpoint.is_alive())
+        self.assertEqual(endpoint.active, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
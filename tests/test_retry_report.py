@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+重试与运行报告 - 模拟多次尝试的批量采集，报告与统计应一致，每台设备只保留最终一次尝试
+"""
+
+import csv
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from modules.ssh_collector_core import LLDPSSHCollector
+
+
+class FakeSession:
+    shell = matcher = None
+
+    def close(self):
+        pass
+
+
+class FlakyCollector(LLDPSSHCollector):
+    """SW1首次超时、第二次成功；SW2每次都超时"""
+
+    def __init__(self, base_dir):
+        super().__init__(base_dir, lambda msg: None)
+        self.attempts = []
+
+    def open_session(self, dev, timing):
+        name = dev["设备名称"]
+        self.attempts.append(name)
+        timing.proxy = "direct"
+        timing.mark("connect")
+        if name == "SW2" or self.attempts.count(name) == 1:
+            raise TimeoutError("timed out")
+        return FakeSession()
+
+    def run_commands(self, shell, matcher, name, commands, timing):
+        return ["" for _ in commands]
+
+
+class RetryReportTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="lldp_test_")
+        config_dir = os.path.join(self.work_dir, "config")
+        os.makedirs(config_dir)
+        with open(os.path.join(config_dir, "proxies.txt"), "w", encoding="utf-8") as f:
+            f.write("[direct]\ntype = direct\n")
+        self.inventory = os.path.join(self.work_dir, "设备清单.csv")
+        with open(self.inventory, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["设备名称", "厂商", "管理IP", "用户名", "密码", "启用"])
+            writer.writerow(["SW1", "华为", "10.0.0.1", "u", "p", "是"])
+            writer.writerow(["SW2", "华为", "10.0.0.2", "u", "p", "是"])
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_report_matches_stats(self):
+        collector = FlakyCollector(self.work_dir)
+        collector.collect_batch(self.inventory, 2, max_attempts=3, retry_delay=0)
+
+        self.assertEqual(collector.attempts.count("SW1"), 2)
+        self.assertEqual(collector.attempts.count("SW2"), 3)
+        self.assertEqual(collector.stats["success"], 1)
+        self.assertEqual(collector.stats["failed"], 1)
+
+        devices = {t.name: t.success for t in collector.report.devices}
+        self.assertEqual(devices, {"SW1": True, "SW2": False})
+
+        output_dir = os.path.join(self.work_dir, "output")
+        (json_path,) = glob.glob(os.path.join(output_dir, "采集报告_*.json"))
+        with open(json_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertEqual(report["success"], collector.stats["success"])
+        self.assertEqual(report["failed"], collector.stats["failed"])
+        self.assertEqual(len(report["devices"]), 2)
+
+        with open(os.path.join(output_dir, "lldp_collect.prom"), encoding="utf-8") as f:
+            series = [
+                line.rsplit(" ", 1)[0]
+                for line in f.read().splitlines()
+                if line and not line.startswith("#")
+            ]
+        self.assertEqual(len(series), len(set(series)))
+
+
+if __name__ == "__main__":
+    unittest.main()
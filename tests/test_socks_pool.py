@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+代理池 - 跳板机打开通道失败时的失败分类与并发名额释放
+"""
+
+import os
+import sys
+import unittest
+
+import paramiko
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from modules.socks_pool import ProxyEndpoint, ProxyPool, ProxyTargetError
+from modules.ssh_session import classify_error
+
+
+class FailingTransport:
+    def __init__(self, code, text):
+        self.error = paramiko.ChannelException(code, text)
+
+    def is_active(self):
+        return True
+
+    def open_channel(self, *args, **kwargs):
+        raise self.error
+
+    def close(self):
+        pass
+
+
+class JumpHostFailureTest(unittest.TestCase):
+    def connect(self, code, text):
+        endpoint = ProxyEndpoint("jump", type="ssh", max_sessions=1)
+        endpoint._jump_transport = FailingTransport(code, text)
+        pool = ProxyPool([endpoint])
+        with self.assertRaises(ProxyTargetError) as ctx:
+            pool.connect({"管理IP": "10.0.0.1"}, 22, 5)
+        self.assertEqual(endpoint.active, 0)
+        self.assertTrue(endpoint.is_alive())
+        return classify_error(ctx.exception)
+
+    def test_open_failure_codes(self):
+        cases = [
+            (1, "administratively prohibited", "unreachable"),
+            (2, "Connection refused", "refused"),
+            (2, "Connection timed out", "timeout"),
+            (2, "No route to host", "unreachable"),
+            (3, "unknown channel type", "other"),
+            (4, "resource shortage", "timeout"),
+        ]
+        for code, text, kind in cases:
+            with self.subTest(code=code, text=text):
+                self.assertEqual(self.connect(code, text), kind)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+采集压测 - 启动本地模拟交换机(tools/fake_switch.py)，用 LLDPSSHCollector 采集N台模拟设备，
+输出吞吐(台/秒)、单台耗时p50/p99与CPU占用，便于在没有网络设备的环境(如CI)中比较引擎与参数
+
+用法示例：
+    python tools/bench_collector.py -n 500 -c 200 --engine asyncio
+    python tools/bench_collector.py -n 500 -c 100 -p 4 --latency 0.1 --json bench.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(TOOLS_DIR)
+sys.path.insert(0, BASE_DIR)
+
+from modules.ssh_collector_core import LLDPSSHCollector
+from tools.fake_switch import VENDORS
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_port(port, proc, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("模拟交换机启动失败")
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("等待模拟交换机启动超时")
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def prepare_workdir(work_dir, devices, vendors, socks_port):
+    """生成采集所需的命令配置、代理配置与设备清单，返回清单路径"""
+    config_dir = os.path.join(work_dir, "config")
+    os.makedirs(config_dir, exist_ok=True)
+    shutil.copy(os.path.join(BASE_DIR, "config", "lldp_commands.txt"), config_dir)
+    with open(os.path.join(config_dir, "proxies.txt"), "w", encoding="utf-8") as f:
+        f.write(
+            f"[bench]\ntype = socks5\nhost = 127.0.0.1\nport = {socks_port}\nmax_sessions = 0\n"
+        )
+
+    inventory = os.path.join(work_dir, "设备清单.csv")
+    with open(inventory, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["设备名称", "厂商", "管理IP", "用户名", "密码", "启用"])
+        for i in range(devices):
+            vendor = vendors[i % len(vendors)]
+            name = f"BENCH-{i:05d}"
+            ip = f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+            user = VENDORS[vendor]["prefix"] + name
+            writer.writerow([name, vendor, ip, user, "bench", "是"])
+    return inventory
+
+
+def run_benchmark(args):
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="lldp_bench_")
+    ssh_port, socks_port = free_port(), free_port()
+    inventory = prepare_workdir(work_dir, args.devices, args.vendors, socks_port)
+
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(TOOLS_DIR, "fake_switch.py"),
+            "--ssh-port",
+            str(ssh_port),
+            "--socks-port",
+            str(socks_port),
+            "--latency",
+            str(args.latency),
+            "--jitter",
+            str(args.jitter),
+            "--neighbors",
+            str(args.neighbors),
+            "--interfaces",
+            str(args.interfaces),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_port(socks_port, server)
+        logs = []
+        collector = LLDPSSHCollector(work_dir, logs.append)
+        cpu_start, wall_start = os.times(), time.perf_counter()
+        collector.collect_batch(
+            inventory,
+            args.concurrency,
+            engine=args.engine,
+            pipeline=args.pipeline,
+            adaptive=args.adaptive,
+            processes=args.processes,
+        )
+        wall = time.perf_counter() - wall_start
+        cpu_end = os.times()
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    # os.times()的子进程时间包含已结束的分片采集进程，不含仍在运行的模拟交换机
+    cpu = sum(cpu_end[:4]) - sum(cpu_start[:4])
+    totals = [t.total for t in collector.report.devices if t.success]
+    result = {
+        "engine": args.engine,
+        "devices": args.devices,
+        "concurrency": args.concurrency,
+        "processes": args.processes,
+        "pipeline": args.pipeline,
+        "adaptive": args.adaptive,
+        "latency": args.latency,
+        "neighbors": args.neighbors,
+        "success": collector.stats["success"],
+        "failed": collector.stats["failed"],
+        "wall_seconds": round(wall, 3),
+        "devices_per_second": round(collector.stats["success"] / wall, 2),
+        "p50_seconds": round(percentile(totals, 50), 3),
+        "p99_seconds": round(percentile(totals, 99), 3),
+        "cpu_seconds": round(cpu, 3),
+        "cpu_percent": round(cpu / wall * 100, 1),
+    }
+    if args.verbose:
+        sys.stdout.write("".join(logs))
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="SSH采集压测(本地模拟交换机)")
+    parser.add_argument("-n", "--devices", type=int, default=200, help="模拟设备数")
+    parser.add_argument("-c", "--concurrency", type=int, default=50, help="并发上限")
+    parser.add_argument("--engine", choices=["thread", "asyncio"], default="thread")
+    parser.add_argument("-p", "--processes", type=int, default=1, help="采集进程数")
+    parser.add_argument("--pipeline", action="store_true", help="流水线发送命令")
+    parser.add_argument("--adaptive", action="store_true", help="自适应并发")
+    parser.add_argument(
+        "--vendors",
+        nargs="+",
+        choices=list(VENDORS),
+        default=list(VENDORS),
+        help="模拟设备厂商(轮流分配)",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="每条命令的响应延迟(秒)"
+    )
+    parser.add_argument("--jitter", type=float, default=0, help="延迟随机放大比例")
+    parser.add_argument("--neighbors", type=int, default=24, help="每台LLDP邻居条数")
+    parser.add_argument("--interfaces", type=int, default=8, help="每台三层接口条数")
+    parser.add_argument(
+        "--work-dir", help="保留采集结果的工作目录(默认用临时目录并在结束后删除)"
+    )
+    parser.add_argument("--json", help="把结果追加写入该JSON Lines文件")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出采集日志")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    result = run_benchmark(args)
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return 0 if result["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+"""
+模拟交换机 - 本地SSH服务端，模拟华为/华三/锐捷的提示符、分屏与命令回显，可附带一个本地SOCKS5代理
+用于在没有真实设备的环境下验证采集器功能、比较采集引擎与参数的吞吐
+
+用法示例：
+    python tools/fake_switch.py --ssh-port 8022 --socks-port 1080 --latency 0.05 --neighbors 48
+
+设备厂商由登录用户名的前缀决定：hw- 为华为，h3c- 为华三，rj- 为锐捷，无前缀时按 --vendor；
+用户名去掉前缀后作为设备名出现在提示符中。未指定 --password 时任意密码均可登录。
+SOCKS5代理忽略目标地址，所有连接都转到本机的模拟SSH端口。
+需要安装 asyncssh。
+"""
+
+import argparse
+import asyncio
+import random
+import struct
+
+import asyncssh
+
+PAGE_LINES = 24
+
+
+def huawei_version(name, args):
+    return (
+        "Huawei Versatile Routing Platform Software\n"
+        "VRP (R) software, Version 5.170 (S5720 V200R011C10SPC600)\n"
+        "Copyright (C) 2000-2018 HUAWEI TECH Co., Ltd.\n"
+        "HUAWEI S5720-52X-EI-AC Routing Switch uptime is 12 weeks, 3 days, 4 hours, 5 minutes\n"
+    )
+
+
+def huawei_lldp(name, args):
+    lines = []
+    for i in range(1, args.neighbors + 1):
+        lines += [
+            f"GigabitEthernet0/0/{i} has 1 neighbor(s):",
+            "",
+            "Neighbor index                     :1",
+            "Chassis type                       :MAC address",
+            f"Chassis ID                         :4c1f-cc00-{i:04x}",
+            "Port ID type                       :Interface name",
+            f"Port ID                            :GigabitEthernet0/0/{i + 1}",
+            f"Port description                   :To-{name}",
+            f"System name                        :{name}-N{i}",
+            "System description                 :Huawei Versatile Routing Platform Software",
+            "System capabilities supported      :bridge router",
+            "System capabilities enabled        :bridge router",
+            "Management address type            :ipv4",
+            f"Management address                 :10.{i // 250}.{i % 250}.1",
+            "Expired time                       :104s",
+            "",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def huawei_lldp_brief(name, args):
+    lines = [
+        "Local Intf       Neighbor Dev             Neighbor Intf             Exptime(s)"
+    ]
+    for i in range(1, args.neighbors + 1):
+        lines.append(f"GE0/0/{i:<11}{name + '-N' + str(i):<25}GE0/0/{i + 1:<20}104")
+    return "\n".join(lines) + "\n"
+
+
+def huawei_ip_brief(name, args):
+    lines = [
+        "*down: administratively down",
+        "(l): loopback",
+        "(s): spoofing",
+        f"The number of interface that is UP in Physical is {args.interfaces}",
+        f"The number of interface that is UP in Protocol is {args.interfaces}",
+        "",
+        "Interface                         IP Address/Mask      Physical   Protocol  ",
+    ]
+    for i in range(1, args.interfaces + 1):
+        ip = f"10.{100 + i // 250}.{i % 250}.1/24"
+        lines.append(f"{'Vlanif' + str(i):<34}{ip:<21}up         up        ")
+    return "\n".join(lines) + "\n"
+
+
+def h3c_version(name, args):
+    return (
+        "H3C Comware Software, Version 7.1.070, Release 6328P03\n"
+        "Copyright (c) 2004-2021 New H3C Technologies Co., Ltd. All rights reserved.\n"
+        "H3C S6520X-30QC-EI uptime is 0 weeks, 6 days, 2 hours, 11 minutes\n"
+    )
+
+
+def h3c_lldp(name, args):
+    lines = []
+    for i in range(1, args.neighbors + 1):
+        lines += [
+            f"LLDP neighbor-information of port {i}[GigabitEthernet1/0/{i}]:",
+            "LLDP agent nearest-bridge:",
+            " LLDP neighbor index : 1",
+            " Update time         : 0 days, 0 hours, 1 minutes, 2 seconds",
+            " Chassis type        : MAC address",
+            f" Chassis ID          : 5cdd-7000-{i:04x}",
+            " Port ID type        : Interface name",
+            f" Port ID             : GigabitEthernet1/0/{i + 1}",
+            " Time to live        : 121",
+            f" Port description    : GigabitEthernet1/0/{i + 1} Interface",
+            f" System name         : {name}-N{i}",
+            " System description  : H3C Comware Platform Software",
+            " System capabilities supported : Bridge, Router",
+            " System capabilities enabled   : Bridge, Router",
+            " Management address type           : IPv4",
+            f" Management address                : 10.{i // 250}.{i % 250}.1",
+            " Management address interface type : IfIndex",
+            " Management address interface ID   : Unknown",
+            " Management address OID            : 0",
+            " Port VLAN ID(PVID)  : 1",
+            " Maximum frame size  : 9416",
+            "",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def h3c_lldp_list(name, args):
+    lines = ["System Name            Local Interface Chassis ID      Port ID"]
+    for i in range(1, args.neighbors + 1):
+        lines.append(
+            f"{name + '-N' + str(i):<23}{'GE1/0/' + str(i):<16}5cdd-7000-{i:04x}  GE1/0/{i + 1}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def h3c_ip_brief(name, args):
+    lines = [
+        "*down: administratively down",
+        "(s): spoofing  (l): loopback",
+        "Interface                Physical Protocol IP Address      Description ",
+    ]
+    for i in range(1, args.interfaces + 1):
+        ip = f"10.{100 + i // 250}.{i % 250}.1"
+        lines.append(f"{'Vlan' + str(i):<25}up       up       {ip:<16}--")
+    return "\n".join(lines) + "\n"
+
+
+def ruijie_version(name, args):
+    return (
+        "System description      : Ruijie Networks Switch(S5750-48GT4XS-E) By Ruijie Networks\n"
+        "System start time       : 2024-01-01 00:00:00\n"
+        "System uptime           : 30:04:05:06\n"
+        "System hardware version : 1.00\n"
+        "System software version : S5750_RGOS 11.4(1)B12P2\n"
+        "System patch number     : NA\n"
+        "System serial number    : G1LQ10H000001\n"
+    )
+
+
+def ruijie_lldp(name, args):
+    lines = [
+        "Capability codes:",
+        "    (R) Router, (B) Bridge, (T) Telephone, (C) DOCSIS Cable Device",
+        "    (W) WLAN Access Point, (P) Repeater, (S) Station, (O) Other",
+        "System Name          Local Intf           Port ID              Capability Aging-time",
+    ]
+    for i in range(1, args.neighbors + 1):
+        lines.append(
+            f"{name + '-N' + str(i):<21}{'Gi0/' + str(i):<21}{'Gi0/' + str(i + 1):<21}B,R        1m 44s"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def ruijie_ip_brief(name, args):
+    lines = [
+        "Interface                        IP-Address(Pri)      IP-Address(Sec)      Status                 Protocol "
+    ]
+    for i in range(1, args.interfaces + 1):
+        ip = f"10.{100 + i // 250}.{i % 250}.1/24"
+        lines.append(f"{'VLAN ' + str(i):<33}{ip:<21}{'no address':<21}{'up':<23}up")
+    return "\n".join(lines) + "\n"
+
+
+VENDORS = {
+    "华为": {
+        "prefix": "hw-",
+        "prompt": "<{name}>",
+        "more": "  ---- More ----",
+        "error": "Error: Unrecognized command found at '^' position.\n",
+        "paging": "screen-length 0 temporary",
+        "paging_reply": "Info: The configuration takes effect on the current user terminal interface only.\n",
+        "outputs": {
+            "display version": huawei_version,
+            "display lldp neighbor": huawei_lldp,
+            "display lldp neighbor brief": huawei_lldp_brief,
+            "display ip interface brief": huawei_ip_brief,
+        },
+    },
+    "华三": {
+        "prefix": "h3c-",
+        "prompt": "<{name}>",
+        "more": "---- More ----",
+        "error": "% Unrecognized command found at '^' position.\n",
+        "paging": "screen-length disable",
+        "paging_reply": "",
+        "outputs": {
+            "display version": h3c_version,
+            "display lldp neighbor-information verbose": h3c_lldp,
+            "display lldp neighbor-information list": h3c_lldp_list,
+            "display ip interface brief": h3c_ip_brief,
+        },
+    },
+    "锐捷": {
+        "prefix": "rj-",
+        "prompt": "{name}#",
+        "more": " --More-- ",
+        "error": "% Invalid input detected at '^' marker.\n",
+        "paging": "terminal length 0",
+        "paging_reply": "",
+        "outputs": {
+            "show version": ruijie_version,
+            "show lldp neighbors": ruijie_lldp,
+            "show ip interface brief": ruijie_ip_brief,
+        },
+    },
+}
+
+
+def resolve_user(username, default_vendor):
+    """按用户名前缀确定(厂商, 设备名)"""
+    for vendor, profile in VENDORS.items():
+        if username.startswith(profile["prefix"]):
+            return vendor, username[len(profile["prefix"]) :]
+    return default_vendor, username
+
+
+class FakeSwitchServer(asyncssh.SSHServer):
+    def __init__(self, password):
+        self.password = password
+
+    def begin_auth(self, username):
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    def validate_password(self, username, password):
+        return self.password is None or password == self.password
+
+
+class FakeSwitchShell:
+    def __init__(self, process, args):
+        self.process = process
+        self.args = args
+        vendor, self.name = resolve_user(
+            process.get_extra_info("username"), args.vendor
+        )
+        self.profile = VENDORS[vendor]
+        self.prompt = self.profile["prompt"].format(name=self.name)
+        self.paging = True
+
+    def write(self, text):
+        self.process.stdout.write(text.replace("\n", "\r\n"))
+
+    async def delay(self, seconds):
+        if seconds > 0:
+            await asyncio.sleep(seconds * random.uniform(1, 1 + self.args.jitter))
+
+    async def run(self):
+        await self.delay(self.args.login_delay)
+        self.write(f"\nInfo: The max number of VTY users is 21.\n{self.prompt}")
+        buf = ""
+        while True:
+            try:
+                data = await self.process.stdin.read(4096)
+            except (asyncssh.Error, OSError):
+                break
+            if not data:
+                break
+            buf += data
+            while True:
+                i = min(
+                    (p for p in (buf.find("\r"), buf.find("\n")) if p >= 0), default=-1
+                )
+                if i < 0:
+                    break
+                line, end, buf = buf[:i].strip(), buf[i], buf[i + 1 :]
+                if end == "\r" and buf.startswith("\n"):
+                    buf = buf[1:]
+                if not await self.execute(" ".join(line.split())):
+                    self.process.exit(0)
+                    return
+
+    async def execute(self, line):
+        self.write(line + "\n")
+        if line in ("quit", "exit"):
+            return False
+        if not line:
+            self.write(self.prompt)
+            return True
+        await self.delay(self.args.latency)
+        if line == self.profile["paging"]:
+            self.paging = False
+            output = self.profile["paging_reply"]
+        elif line in self.profile["outputs"]:
+            output = self.profile["outputs"][line](self.name, self.args)
+        else:
+            output = self.profile["error"]
+        await self.send_output(output)
+        self.write(self.prompt)
+        return True
+
+    async def send_output(self, output):
+        lines = output.splitlines(keepends=True)
+        if not self.paging or len(lines) <= PAGE_LINES:
+            self.write(output)
+            return
+        more = self.profile["more"]
+        for start in range(0, len(lines), PAGE_LINES):
+            self.write("".join(lines[start : start + PAGE_LINES]))
+            if start + PAGE_LINES >= len(lines):
+                return
+            self.write(more)
+            key = await self.process.stdin.read(1)
+            self.write(f"\x1b[{len(more)}D{' ' * len(more)}\x1b[{len(more)}D")
+            if not key or key in "qQ":
+                return
+
+
+async def handle_socks(reader, writer, ssh_port):
+    """最小的SOCKS5 CONNECT实现：不鉴权，忽略目标地址，转到本机模拟SSH端口"""
+    try:
+        version, nmethods = await reader.readexactly(2)
+        await reader.readexactly(nmethods)
+        writer.write(b"\x05\x00")
+        _, cmd, _, atyp = await reader.readexactly(4)
+        if atyp == 1:
+            await reader.readexactly(4)
+        elif atyp == 3:
+            await reader.readexactly((await reader.readexactly(1))[0])
+        else:
+            await reader.readexactly(16)
+        await reader.readexactly(2)
+        if version != 5 or cmd != 1:
+            writer.write(b"\x05\x07\x00\x01" + bytes(6))
+            return
+        upstream_reader, upstream_writer = await asyncio.open_connection(
+            "127.0.0.1", ssh_port
+        )
+    except (asyncio.IncompleteReadError, OSError):
+        writer.close()
+        return
+    writer.write(b"\x05\x00\x00\x01" + bytes(4) + struct.pack("!H", 0))
+
+    async def pipe(src, dst):
+        try:
+            while True:
+                data = await src.read(65536)
+                if not data:
+                    break
+                dst.write(data)
+                await dst.drain()
+        except OSError:
+            pass
+        finally:
+            dst.close()
+
+    await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+
+
+async def serve(args):
+    host_key = asyncssh.generate_private_key("ssh-ed25519")
+    await asyncssh.create_server(
+        lambda: FakeSwitchServer(args.password),
+        args.host,
+        args.ssh_port,
+        server_host_keys=[host_key],
+        process_factory=lambda process: FakeSwitchShell(process, args).run(),
+        encoding="utf-8",
+        line_editor=False,
+        backlog=4096,
+    )
+    if args.socks_port:
+        await asyncio.start_server(
+            lambda r, w: handle_socks(r, w, args.ssh_port),
+            args.host,
+            args.socks_port,
+            backlog=4096,
+        )
+    print(
+        f"模拟交换机已启动: SSH {args.host}:{args.ssh_port}"
+        + (f", SOCKS5 {args.host}:{args.socks_port}" if args.socks_port else ""),
+        flush=True,
+    )
+    await asyncio.Event().wait()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="模拟华为/华三/锐捷交换机的本地SSH服务"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--ssh-port", type=int, default=8022)
+    parser.add_argument(
+        "--socks-port", type=int, default=0, help="本地SOCKS5代理端口(0为不启动)"
+    )
+    parser.add_argument("--password", help="登录密码(不指定则接受任意密码)")
+    parser.add_argument("--vendor", choices=list(VENDORS), default="华为")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="每条命令的响应延迟(秒)"
+    )
+    parser.add_argument(
+        "--login-delay", type=float, default=0, help="登录后输出提示符前的延迟(秒)"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0, help="延迟随机放大比例，如0.5为1~1.5倍"
+    )
+    parser.add_argument("--neighbors", type=int, default=24, help="LLDP邻居条数")
+    parser.add_argument("--interfaces", type=int, default=8, help="三层接口条数")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()